@@ -3,14 +3,12 @@
 import sys
 
 import numpy as np
-import random
-
-from numbertheory.polynomial import Polynomial
 
 '''
 This module contains all the channel functions,
 	which take a 1d-array of ints and spit out another,
 	correlated but randomly changed, depending on the type of channel
+a 2d-array is a batch of words, shaped (trials, n), and each word goes through the channel separately
 '''
 
 # the standard nothing-happened channel
@@ -21,6 +19,7 @@ def noiseless(x):
 '''
 for each of these:	t = max number of bit issues
 					p = probability of each bit having issue
+					rng = numpy RandomState to draw from (default: numpy.random)
 note:	if additional parameters are not given
 			they will act like a noiseless channel
 		if both parameters are given
@@ -28,74 +27,82 @@ note:	if additional parameters are not given
 '''
 
 # the standard flip-a-bit channel
-def symmetric(x, t=0, p=0):
-	if not t*p==0:
-		sys.exit("Parameters t="+str(t)+" and p="+str(p)+" are incompatible.")
-	
+def symmetric(x, t=0, p=0, rng=None):
 	y = np.copy(x)
-	n = len(x)
-	
-	if not p==0:
-		pattern = _p_pattern(n, p)
-	else:
-		pattern = _t_pattern(n, t)
-	
+	pattern = mask(np.shape(y), t, p, rng)
 	y[pattern] = (y[pattern]+1) % 2		# flip the bits
 	return y
 
 # bits may be erased (ie replaced with -1)
-def erasure(x, t=0, p=0):
-	if not t*p==0:
-		sys.exit("Parameters t="+str(t)+" and p="+str(p)+" are incompatible.")
-	
+def erasure(x, t=0, p=0, rng=None):
+	return erasures(x, t, p, rng)[0]
+
+# as erasure, but also returns the boolean mask of which bits were erased
+#	so decoders can take their locations straight from it
+def erasures(x, t=0, p=0, rng=None):
 	y = np.copy(x)
-	n = len(x)
+	pattern = mask(np.shape(y), t, p, rng)
 	
-	if not p==0:
-		pattern = _p_pattern(n, p)
-	else:
-		pattern = _t_pattern(n, t)
-	
-	if isinstance(y[0], Polynomial):
+	if y.dtype == object:		# arrays of Polynomials
 		y[pattern] = None
 	else:
 		y[pattern] = -1		# "erase" the bits
-	return y
+	return y, pattern
 
 # bits may be deleted (so the returned string is straight-up shorter)
-def deletion(x, t=0, p=0):
+#	for a batch of words, every word loses t bits, so the batch stays rectangular
+#	(with p, each word may lose a different number, so a list of words is returned)
+def deletion(x, t=0, p=0, rng=None):
+	y = np.copy(x)
+	pattern = mask(np.shape(y), t, p, rng)
+	
+	if y.ndim == 1:
+		return y[~pattern]	# delete the bits
+	if p == 0:
+		return y[~pattern].reshape(y.shape[:-1] + (y.shape[-1]-t,))
+	return [w[~m] for (w, m) in zip(y.reshape(-1, y.shape[-1]), pattern.reshape(-1, y.shape[-1]))]
+
+'''
+mask: shape (int or tuple), [t] (int), [p] (float), [rng] (numpy RandomState)
+	returns a boolean array of the given shape, True where a bit has an issue
+	each word (the last axis) has exactly t issues, or each bit has one with probability p
+	the whole batch of words is drawn in one call, from rng if given, or numpy.random otherwise
+'''
+def mask(shape, t=0, p=0, rng=None):
 	if not t*p==0:
 		sys.exit("Parameters t="+str(t)+" and p="+str(p)+" are incompatible.")
-	
-	y = np.copy(x)
-	n = len(x)
+	if rng is None:
+		rng = np.random		# the module-level functions draw from the state numpy.random.seed sets
 	
 	if not p==0:
-		pattern = _p_pattern(n, p)
-	else:
-		pattern = _t_pattern(n, t)
-		
-	y = np.delete(y, pattern)	# delete the bits
-	return y
+		return _p_mask(shape, p, rng)
+	return _t_mask(shape, t, rng)
 
 '''
 helper methods
 '''
-def _t_pattern(n, t):
-	return random.sample(range(n), t)
+# picks t indices of each word, as those with the t smallest of n random keys
+def _t_mask(shape, t, rng):
+	if np.isscalar(shape):
+		shape = (shape,)
+	n = shape[-1]
+	if not (0 <= t <= n):
+		sys.exit("Parameter t="+str(t)+" is not a valid number of issues [0,"+str(n)+"].")
+	pattern = np.zeros(shape, dtype=bool)
+	if t == 0:
+		return pattern
+	keys = rng.random_sample(shape)
+	if t < n:
+		cut = np.partition(keys, t-1, axis=-1)[..., t-1:t]
+		pattern[keys <= cut] = True
+	else:
+		pattern[...] = True
+	return pattern
 
 # samples each index from n at probability p
-def _p_pattern(n, p):
+def _p_mask(shape, p, rng):
 	# check that p is valid probability:
 	if not (0 <= p <= 1):
 		sys.exit("Parameter p="+str(p)+" is not a valid probability [0,1].")
 	
-	# now maintain a pattern and add each index to it iff random number is within p
-	pattern = []
-	for i in range(n):
-		if random.random() < p:
-			pattern += [i]
-	return pattern
-
-
-
+	return rng.random_sample(shape) < p
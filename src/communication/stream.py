@@ -0,0 +1,199 @@
+#!/usr/bin/env python
+
+import time
+import itertools
+
+import numpy as np
+
+import communication.channel as channel
+import communication.word as word
+from numbertheory.code import syndrome, decode, syndrome_RS, decode_RS
+from numbertheory.linalg import Matrix
+import numbertheory.cache as cache
+import numbertheory.bitmatrix as bitmatrix
+
+'''
+This module reconciles arbitrarily long bitstreams, one fixed-size block at a time
+	every stage is a generator, taking the blocks of the stage before it,
+	so a stream is read, sent through the channel, and reconciled in a single pass,
+	and only a few blocks are ever in memory at once, however long the stream is
+
+	blocks		source -> x
+	erase		x -> (x, y)
+	send_RS		(x, y) -> (x, y, s)		or send_RN		(x, y) -> (x, y, s, H)
+	receive_RS	(x, y, s) -> (x, y, X)	or receive_RN	(x, y, s, H) -> (x, y, X)
+	report		(x, y, X) -> dict per block
+
+	x is carried along every stage only so that report can check X against it
+	y is a word.Bits: the received block packed 8 bits to a byte, with its erasures in a separate bitmask
+'''
+
+''' CHUNK: blocks read from a file at a time '''
+CHUNK = 64
+
+
+
+# SOURCE
+
+''' blocks: source (file, or iterable of bits), n (int)
+		yields the bits of source in n-bit blocks, as 1d-arrays of ints
+			a file is read in binary, CHUNK blocks at a time, each byte giving 8 bits (most significant first)
+			the last block is padded with zeros up to n bits
+		'''
+def blocks(source, n):
+	if hasattr(source, 'read'):
+		chunks = _filechunks(source, n)
+	else:
+		chunks = _iterchunks(source, n)
+
+	rest = np.zeros(0, dtype=int)		# bits read, but not yet yielded
+	for chunk in chunks:
+		bits = np.concatenate((rest, chunk))
+		full = len(bits) - len(bits) % n
+		for i in range(0, full, n):
+			yield bits[i:i+n]
+		rest = bits[full:]
+	if len(rest) > 0:
+		yield np.pad(rest, (0,n-len(rest)), 'constant')
+
+''' _iterchunks: bits (iterable of bits), n (int)
+		yields the bits as 1d-arrays, CHUNK blocks of n bits at a time
+		'''
+def _iterchunks(bits, n):
+	bits = iter(bits)
+	while True:
+		chunk = np.fromiter(itertools.islice(bits, CHUNK*n), dtype=int)
+		if len(chunk) == 0:
+			return
+		yield chunk
+
+''' _filechunks: f (file), n (int)
+		yields the bits of binary file f, most significant first, CHUNK blocks of n bits at a time
+		'''
+def _filechunks(f, n):
+	size = max(1, (CHUNK*n + 7) // 8)
+	while True:
+		data = f.read(size)
+		if not data:
+			return
+		yield np.unpackbits(np.frombuffer(data, dtype=np.uint8)).astype(int)
+
+
+
+# CHANNEL
+
+''' erase: xs (iterable of 1d-arrays), [t] (int), [p] (float)
+		yields (x, y) for each block x, where y is x sent through the erasure channel, as a word.Bits,
+			with t erasures per block, or each bit erased with probability p (see channel.erasure)
+		'''
+def erase(xs, t=0, p=0):
+	for x in xs:
+		yield x, word.Bits(channel.erasure(x, t=t, p=p))
+
+
+
+# RS PROTOCOL: EACH BLOCK IS GROUPED INTO m-BIT SYMBOLS OF GF(2^m)
+
+''' send_RS: pairs (iterable of (x,y)), t (int)
+		sender side of the RS protocol: yields (x, y, s), where s is t syndrome symbols of x
+		'''
+def send_RS(pairs, t):
+	for (x, y) in pairs:
+		m = word.symbol_bits(len(x))
+		yield x, y, syndrome_RS(cache.field(2**m), word.symbols(x, m), t)
+
+''' receive_RS: messages (iterable of (x,y,s))
+		receiver side of the RS protocol: yields (x, y, X), where X is the bits of y reconciled with s,
+			or None if y has more erased symbols than s can solve
+		'''
+def receive_RS(messages):
+	for (x, y, s) in messages:
+		m = word.symbol_bits(len(y))
+		locs = np.flatnonzero(y.erased_symbols(m))		# a symbol with any erased bit is erased
+		X = decode_RS(cache.field(2**m), s, y.symbols(m).astype(np.int64), locs)
+		yield x, y, (None if X is None else word.bits(X, m, len(y)))
+
+# RN PROTOCOL: EACH BLOCK IS CHECKED BY c RANDOM PARITIES
+
+''' send_RN: pairs (iterable of (x,y)), c (int), R (random bit generator)
+		sender side of the RN protocol: yields (x, y, s, H), where H is c rows of R and s = H*x
+			R must give rows as long as the blocks, and the receiver must share it (here, H is passed along)
+			if R is a word.HASH, only its key need be shared: H is then (R, rows), the rows of R used,
+				and neither side ever makes the whole c x n matrix
+		'''
+def send_RN(pairs, c, R):
+	Z2 = cache.field(2)
+	for (x, y) in pairs:
+		if isinstance(R, word.HASH):
+			rows = np.arange(R.row, R.row + c)
+			R.row += c
+			yield x, y, R.syndrome(x, rows), (R, rows)
+		else:
+			H = Matrix(np.asarray(word.rows(R, c)), Z2)
+			yield x, y, syndrome(H, x), H
+
+''' receive_RN: messages (iterable of (x,y,s,H))
+		receiver side of the RN protocol: yields (x, y, X), where X is y reconciled with s,
+			or None if the erasures are not uniquely solved
+		'''
+def receive_RN(messages):
+	for (x, y, s, H) in messages:
+		(Y, locs) = (y.unpack(), y.erasures())
+		if isinstance(H, tuple):
+			yield x, y, _decode_hashed(H[0], H[1], s, Y, locs)
+		else:
+			yield x, y, decode(H, s, Y, locs)
+
+''' _decode_hashed: R (word.HASH), rows (1d-array of ints), s (1d-array), y (1d-array), locs (list of ints)
+		as code.decode, for H the given rows of R, but making only the columns of H at locs:
+			the known bits' part of H*y is made a block of rows at a time by R.syndrome,
+			and leaves H[:,locs]*e = s - H*y0, with y0 the known bits of y (erasures as 0)
+		'''
+def _decode_hashed(R, rows, s, y, locs):
+	y = np.asarray(y)
+	X = y.clip(0)
+	if len(locs) == 0:
+		return X
+	z = (np.asarray(s) ^ R.syndrome(X, rows)) & 1
+	e = bitmatrix.solve(R.columns(locs, rows), z)
+	if e is None:
+		return None
+	X[locs] = e
+	return X
+
+
+
+# RESULTS
+
+''' report: results (iterable of (x,y,X))
+		yields a dictionary for each block, with:
+			"block": its index, "erasures": bits erased in y,
+			"ok": whether X is x, and "time": seconds since the previous block was reported
+		'''
+def report(results):
+	now = time.time()
+	for (i, (x, y, X)) in enumerate(results):
+		done = time.time()
+		yield {"block": i,
+		       "erasures": len(y.erasures()),
+		       "ok": X is not None and bool(np.all(X == x)),
+		       "time": done - now}
+		now = time.time()		# time spent by the caller between blocks is not counted
+
+''' reconcile: source (file, or iterable of bits), n (int), r (int), [protocol] (string),
+				[t] (int), [p] (float), [R] (random bit generator)
+		the whole pipeline: source is cut into n-bit blocks, each is sent through the erasure channel,
+			and reconciled with r redundant symbols ("RS") or r random parities ("RN", from R)
+		yields the report for each block
+		'''
+def reconcile(source, n, r, protocol="RS", t=0, p=0, R=None):
+	pairs = erase(blocks(source, n), t=t, p=p)
+	if protocol == "RS":
+		results = receive_RS(send_RS(pairs, r))
+	elif protocol == "RN":
+		if R is None:
+			raise ValueError("The RN protocol needs a random bit generator R.")
+		results = receive_RN(send_RN(pairs, r, R))
+	else:
+		raise ValueError("Unknown protocol: "+str(protocol))
+	return report(results)
@@ -3,6 +3,8 @@
 import numpy as np
 from numbertheory.polynomial import Polynomial as P
 import numbertheory.numbertheory as nt
+import numbertheory.gf2x as gf2x
+import numbertheory.bitmatrix as bitmatrix
 
 
 ''' random - returns a random string of length n, base q (default 2) '''
@@ -64,11 +66,200 @@ def hexify(x, m=1):
 
 ''' polynomials: word (1d-array), F (FiniteField), m (int)
 		returns an array of polynomials, grouping word into m-unit blocks
+			a block with an erased (negative) unit gives None
 		F is the coefficient field these polynomials should have (usually Z2)
 		'''
 def polynomials(word, F, m):
-	sections = range(0,len(word),m)
-	return np.array([P(V,F) for V in np.split(word, sections[1:])])
+	E = symbols(word, m, F.order)
+	X = np.empty(len(E), dtype=object)		# filled one by one: numpy would try to unpack each Polynomial
+	for i in range(len(E)):
+		X[i] = None if E[i] < 0 else P(int(E[i]), F)
+	return X
+
+''' symbols: word (1d-array), m (int), [q] (int)
+		returns word grouped into m-unit blocks, as an int array of symbols
+			unit d of a block is digit d (base q) of its symbol, so each symbol is int(Polynomial) of its block
+			the last block is padded with zeros
+			a block with an erased (negative) unit is itself erased, and gives the symbol -1
+		symbols fit in int32 if they can, and are signed for the -1s
+		'''
+def symbols(word, m, q=2):
+	word = np.asarray(word)
+	blocks = np.pad(word, (0,-len(word) % m), 'constant').reshape(-1, m)
+	dtype = np.int32 if q**m <= 2**31 else np.int64
+	S = blocks.clip(0).astype(dtype).dot((q**np.arange(m)).astype(dtype))
+	S[(blocks < 0).any(axis=1)] = -1
+	return S
+
+''' bits: S (1d-array of ints), m (int), [n] (int), [q] (int)
+		returns the word that symbols would have grouped into S, cut to its first n units
+			each negative (erased) symbol gives m erased (-1) units
+		'''
+def bits(S, m, n=None, q=2):
+	S = np.asarray(S, dtype=np.int64)
+	if q == 2:
+		word = (S[:,np.newaxis] >> np.arange(m)) & 1
+	else:
+		word = (S[:,np.newaxis] // q**np.arange(m)) % q
+	word[S < 0] = -1
+	return word.reshape(-1)[:n].astype(int)
+
+''' symbol_bits: n (int)
+		returns the smallest m for which n bits make at most 2**m - 1 symbols of m bits,
+			the longest word an RS code over GF(2^m) can have
+		'''
+def symbol_bits(n):
+	m = 1
+	while n > m*(2**m - 1):
+		m += 1
+	return m
+
+
+
+
+
+# PACKED WORDS: 8 BITS TO A BYTE, WITH ERASURES IN A SEPARATE BITMASK
+
+''' Bits - a packed binary word
+		bit i of the word is bit (i % 8) of byte (i // 8), least significant first,
+		so bytes, and little-endian views of them, read as m-bit symbols in the same order as int(Polynomial)
+		bits past the end of the word, in the last byte, are ignored
+		'''
+class Bits:
+	''' Bits - x (1d-array of 0s, 1s, and -1s for erasures)
+			'''
+	def __init__(self, x):
+		x = np.asarray(x)
+		''' self.n: number of bits in the word '''
+		self.n = len(x)
+		''' self.data: the packed bits (erased bits are 0) '''
+		self.data = _pack(x > 0)
+		''' self.erased: the packed erasure bitmask '''
+		self.erased = _pack(x < 0)
+	
+	''' wrap - data (uint8 array), n (int), [erased] (uint8 array)
+			returns the word of the first n packed bits of data, without copying them
+			'''
+	@staticmethod
+	def wrap(data, n, erased=None):
+		b = Bits([])
+		b.n = n
+		b.data = data
+		b.erased = np.zeros(len(data), dtype=np.uint8) if erased is None else erased
+		return b
+	
+	''' unpack - returns the word as a 1d-array of ints, with -1 for erasures '''
+	def unpack(self):
+		x = _unpack(self.data, self.n).astype(int)
+		x[_unpack(self.erased, self.n).astype(bool)] = -1
+		return x
+	
+	''' len(Bits) is the number of bits '''
+	def __len__(self):
+		return self.n
+	
+	''' Bits[i] is bit i (or -1 if it is erased)
+		Bits[a:b] is the word of bits a to b, sharing storage with this one if a is a multiple of 8
+		'''
+	def __getitem__(self, key):
+		if isinstance(key, slice):
+			(a, b, step) = key.indices(self.n)
+			if step == 1 and a % 8 == 0:
+				b = max(a, b)
+				return Bits.wrap(self.data[a//8:(b+7)//8], b-a, self.erased[a//8:(b+7)//8])
+			return Bits(self.unpack()[key])
+		if key < 0:
+			key += self.n
+		if not 0 <= key < self.n:
+			raise IndexError(str(key)+" is out of range for a word of "+str(self.n)+" bits")
+		if (self.erased[key//8] >> (key % 8)) & 1:
+			return -1
+		return int((self.data[key//8] >> (key % 8)) & 1)
+	
+	''' Bits1 ^ Bits2 adds two words of the same length, a byte (8 bits) at a time
+			a bit erased in either word is erased in the sum
+			'''
+	def __xor__(self, other):
+		if not self.n == other.n:
+			raise ValueError("Words have different lengths. Cannot add.")
+		return Bits.wrap(self.data ^ other.data, self.n, self.erased | other.erased)
+	
+	''' Bits1 == Bits2 iff they have the same bits and the same erasures '''
+	def __eq__(self, other):
+		if not isinstance(other, Bits) or not self.n == other.n:
+			return False
+		return not (self._masked(self.data ^ other.data).any() or self._masked(self.erased ^ other.erased).any())
+	
+	''' Bits1 != Bits2 iff not Bits1 == Bits2 '''
+	def __ne__(self, other):
+		return not self == other
+	
+	''' weight - returns the number of (unerased) 1 bits '''
+	def weight(self):
+		return int(_weight_[self._masked(self.data & ~self.erased)].sum())
+	
+	''' parity - returns whether the word has odd or even weight, as parity does '''
+	def parity(self):
+		return self.weight() & 1
+	
+	''' erasures - returns the indices of the erased bits '''
+	def erasures(self):
+		return np.flatnonzero(_unpack(self.erased, self.n))
+	
+	''' symbols - m (int)
+			returns the word cut into m-bit symbols, as an int array
+				bit d of each symbol is bit d of its section of the word (so symbol = int(Polynomial))
+				if m is 8, 16, 32, or 64, and the word is a whole number of symbols, this is a view of the bytes
+				otherwise the last symbol is padded with zeros
+			'''
+	def symbols(self, m):
+		return self._symbols(self.data, m)
+	
+	''' erased_symbols - m (int)
+			returns a bool array, True for each m-bit symbol (as in symbols) with an erased bit
+			'''
+	def erased_symbols(self, m):
+		return self._symbols(self.erased, m) != 0
+	
+	''' str(Bits) is the word as by strify '''
+	def __str__(self):
+		return strify(self.unpack())
+	
+	''' repr(Bits) does the same as str '''
+	def __repr__(self):
+		return str(self)
+	
+	# byte-aligned symbols are read straight from the bytes, as little-endian ints
+	def _symbols(self, data, m):
+		if m in (8, 16, 32, 64) and self.n % m == 0:
+			return data[:self.n//8].view('<u'+str(m//8))
+		bits = _unpack(data, self.n)
+		bits = np.pad(bits, (0,-self.n % m), 'constant').reshape(-1, m).astype(np.int64)
+		return (bits << np.arange(m)).sum(axis=1)
+	
+	# clears the bits past the end of the word in a copy of packed data
+	def _masked(self, data):
+		data = data[:(self.n+7)//8].copy()
+		if self.n % 8:
+			data[-1] &= (1 << (self.n % 8)) - 1
+		return data
+
+''' _pack - bits (1d-array of 0s and 1s)
+		returns the bits packed 8 to a byte, least significant first
+		'''
+def _pack(bits):
+	return _reverse_[np.packbits(bits)]		# packbits fills bytes most significant first
+
+''' _unpack - data (uint8 array), n (int)
+		returns the first n bits packed in data, as a uint8 array
+		'''
+def _unpack(data, n):
+	return np.unpackbits(_reverse_[data[:(n+7)//8]])[:n]
+
+''' _reverse_: each byte with its bits in reverse order '''
+_reverse_ = np.array([int(format(b, '08b')[::-1], 2) for b in range(256)], dtype=np.uint8)
+''' _weight_: the number of 1 bits in each byte '''
+_weight_ = np.array([bin(b).count('1') for b in range(256)], dtype=np.int64)
 
 
 
@@ -76,25 +267,165 @@ def polynomials(word, F, m):
 
 # RANDOM BIT STREAMS: CONSTRUCTED WITH n AND seed, .next() gives n-bit word
 
-''' NUMPY - a pseudo-random stream utilizing numpy.random '''
+''' rows: R (random bit stream), c (int)
+		returns the next c rows of R, as a c x n array
+			in one call to R.next_block, for streams that have it
+		'''
+def rows(R, c):
+	if hasattr(R, 'next_block'):
+		return R.next_block(c)
+	return np.array([R.next() for i in range(c)])
+
+''' NUMPY - a pseudo-random stream utilizing numpy.random
+		each stream has its own RandomState, so streams never disturb one another, or the global numpy.random
+		(for the same seed, the bits are the same as when the global state was reseeded)
+		'''
 class NUMPY:
-	''' NUMPY - n (int), seed (n-vector)
+	''' NUMPY - n (int), seed (n-vector), [key] (list of ints)
+			PRE seed must be n-vector (compatibility purposes)
+			if key is given, seed is ignored, and this is the stream spawned with that key (see spawn)
+			'''
+	def __init__(self, n, seed, key=None):
+		self.n = n
+		if key is None:
+			if len(seed) != n:
+				raise ValueError("Seed is incompatible length.")
+			seed_num = sum([(2**i)*seed[i] % 2147483647 for i in range(n)]) % 2147483647
+			(key, state) = ([int(seed_num)], seed_num)
+		else:
+			state = key
+		''' self.key: the seed of this stream, followed by its index among the spawn of each ancestor '''
+		self.key = key
+		''' self.spawned: the number of streams spawned from this one so far '''
+		self.spawned = 0
+		''' self.rng: the state of this stream '''
+		self.rng = np.random.RandomState(state)
+	
+	''' next - returns the next n-bit grouping of this generator '''
+	def next(self):
+		return self.rng.randint(0, 2, size=self.n)
+	
+	''' next_matrix - c (int)
+			returns the next c n-bit groupings of this generator, as the rows of a c x n matrix
+				drawn in a single call, and identical to c calls to next
+			'''
+	def next_matrix(self, c):
+		return self.rng.randint(0, 2, size=(c, self.n))
+	
+	''' next_block - the same as next_matrix, as the other streams call it '''
+	def next_block(self, c):
+		return self.next_matrix(c)
+	
+	''' spawn - k (int)
+			returns k new streams of the same width, for parallel workers
+				each is seeded by its key: this stream's key, plus its own index among everything spawned from it
+			so the same root seed always spawns the same streams, and no two spawned streams share a key
+			'''
+	def spawn(self, k):
+		children = []
+		for i in range(k):
+			children.append(NUMPY(self.n, None, key=self.key + [self.spawned]))
+			self.spawned += 1
+		return children
+
+
+
+''' HASH - a pseudo-random stream whose every bit can be found on its own
+		bit j of row r is bit (j % 64) of the splitmix64 hash of (key, r, j // 64),
+		so any block of rows, or any set of columns, can be generated without the rest of the matrix
+			and a sender and receiver who share the key share the whole matrix
+		rows are packed the same way as numbertheory.bitmatrix.pack, so a row's hashes are its packed words
+		'''
+class HASH:
+	''' HASH - n (int), seed (n-vector)
 			PRE seed must be n-vector (compatibility purposes)
 			'''
 	def __init__(self, n, seed):
 		if len(seed) != n:
 			raise ValueError("Seed is incompatible length.")
 		self.n = n
-		seed_num = sum([(2**i)*seed[i] % 2147483647 for i in range(n)]) % 2147483647
-		np.random.seed(seed_num)
+		''' self.key: the seed, folded into a 64-bit int (the xor of its packed words) '''
+		self.key = int(np.bitwise_xor.reduce(bitmatrix.pack(np.asarray(seed)), axis=None))
+		''' self.row: the next row next will return '''
+		self.row = 0
 	
 	''' next - returns the next n-bit grouping of this generator '''
 	def next(self):
-		return np.random.random_integers(0,1, size=self.n)
+		return self.next_block(1)[0]
+	
+	''' next_block - k (int)
+			returns the next k n-bit groupings of this generator, as the rows of a k x n array
+			'''
+	def next_block(self, k):
+		rows = np.arange(self.row, self.row + k)
+		self.row += k
+		return bitmatrix.unpack(self.packed(rows), self.n).astype(int)
+	
+	''' packed - rows (1d-array of ints)
+			returns the given rows, bit-packed into uint64 words (see numbertheory.bitmatrix.pack)
+			'''
+	def packed(self, rows):
+		words = np.arange((self.n + 63) // 64, dtype=np.uint64)
+		P = self._hash(rows)[:,np.newaxis] ^ words
+		P = _splitmix(P)
+		if self.n % 64:			# bits past the end of a row are zero, as pack would leave them
+			P[:,-1] &= np.uint64(2**(self.n % 64) - 1)
+		return P
+	
+	''' columns - locs (list of ints), rows (1d-array of ints)
+			returns the matrix of the given rows, but only the columns at locs, as a uint8 array
+			'''
+	def columns(self, locs, rows):
+		locs = np.asarray(locs, dtype=np.uint64)
+		h = _splitmix(self._hash(rows)[:,np.newaxis] ^ (locs // np.uint64(64)))
+		return ((h >> (locs % np.uint64(64))) & np.uint64(1)).astype(np.uint8)
+	
+	''' syndrome - x (1d-array of 0s and 1s), rows (1d-array of ints)
+			returns H*x over GF(2), where H is the matrix of the given rows
+				H is made a block of rows at a time, so at most BLOCK words of it exist at once
+			'''
+	def syndrome(self, x, rows):
+		rows = np.asarray(rows)
+		xp = bitmatrix.pack(np.asarray(x))
+		block = max(1, BLOCK // len(xp))
+		s = np.zeros(len(rows), dtype=np.uint8)
+		for b in range(0, len(rows), block):
+			v = np.bitwise_xor.reduce(self.packed(rows[b:b+block]) & xp, axis=1)
+			s[b:b+block] = _parity(v)
+		return s
+	
+	# each row's own hash, from which the hashes of its words are made
+	def _hash(self, rows):
+		return _splitmix(np.uint64(self.key) ^ np.asarray(rows, dtype=np.uint64))
+
+''' BLOCK: most uint64 words HASH.syndrome makes at once '''
+BLOCK = 2**20
+
+''' _splitmix - z (uint64 array)
+		returns the splitmix64 hash of each element of z
+		'''
+def _splitmix(z):
+	with np.errstate(over='ignore'):		# multiplication is meant to wrap, modulo 2**64
+		z = z + np.uint64(0x9e3779b97f4a7c15)
+		z = (z ^ (z >> np.uint64(30))) * np.uint64(0xbf58476d1ce4e5b9)
+		z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94d049bb133111eb)
+	return z ^ (z >> np.uint64(31))
+
+''' _parity - v (uint64 array)
+		returns the parity of the number of 1 bits in each element of v, as uint8s
+		'''
+def _parity(v):
+	for s in (32, 16, 8, 4, 2, 1):
+		v = v ^ (v >> np.uint64(s))
+	return (v & np.uint64(1)).astype(np.uint8)
 
 
 
-''' LFSR - a pseudo-random Linear Feedback Shift Register generator '''
+''' LFSR - a pseudo-random Linear Feedback Shift Register generator
+		the register is the window s_i ... s_i+n-1 of the bit sequence s_j+n = s_j + s_j+k_1 + s_j+k_2 + ...
+			for the primitive polynomial x**n + x**k_1 + x**k_2 + ... + 1 in numbertheory.primitives
+		its state is packed into an int (bit d is s_i+d), and next_block makes many rows with a few array operations
+		'''
 class LFSR:
 	''' LFSR - n (int), seed (n-vector)
 			PRE: seed must be n-vector
@@ -112,15 +443,74 @@ class LFSR:
 		else:
 			raise ValueError("Must implement auto-primitive generation")
 		
-		self.current = seed
+		''' self.taps: the k for which s_j+k feeds back into s_j+n '''
+		self.taps = np.flatnonzero(self.pattern)
+		''' self.state: the register, s_i ... s_i+n-1, as a uint8 array '''
+		self.state = np.array(seed, dtype=np.uint8) & 1
 	
-	''' next - returns the next n-bit grouping of this generator '''
+	''' next - returns the next n-bit grouping of this generator
+			one shift: the new bit is the parity of the tapped bits
+			'''
 	def next(self):
-		bit = np.dot(self.pattern, self.current) & 1
-		self.current = np.concatenate((self.current[1:], [bit]))
-		return np.array(self.current)
+		bit = np.bitwise_xor.reduce(self.state[self.taps])
+		self.state = np.append(self.state[1:], bit)
+		return self.state.astype(int)
+	
+	''' next_block - k (int)
+			returns the next k n-bit groupings of this generator, as the rows of a k x n array
+			(each is the register one shift after the last, so consecutive rows overlap in n-1 bits)
+			'''
+	def next_block(self, k):
+		n = self.n
+		s = self._sequence(k + n)
+		rows = np.lib.stride_tricks.as_strided(s[1:], shape=(k,n), strides=(s.strides[0],)*2)
+		self.state = s[k:k+n].copy()
+		return rows.astype(int)		# a copy, so the rows no longer share memory
+	
+	''' jump - k (int)
+			advances the register by k shifts, as k calls to next would, in O(n**2 log k) bit operations
+				x**k mod f(x) = c_0 + c_1 x + ... gives s_i+k = c_0 s_i + c_1 s_i+1 + ...
+			so generators with the same seed can each jump to their own disjoint segment of one sequence
+			'''
+	def jump(self, k):
+		n = self.n
+		f = _toint(self.pattern) | (1 << n)
+		S = gf2x.sparse(f)
+		(c, a) = (1, 2)			# x**0, and x
+		while k > 0:
+			if k & 1:
+				c = gf2x.mulmod(c, a, f, S)
+			k >>= 1
+			if k > 0:
+				a = gf2x.mulmod(a, a, f, S)
+		W = _toint(self._sequence(2*n - 1))
+		self.state = np.array([bin(c & (W >> d)).count('1') & 1 for d in range(n)], dtype=np.uint8)
+	
+	# returns s_i ... s_i+N-1 of the sequence, as a uint8 array, where s_i is the first bit of the register
+	#	each step finds as many new bits as the taps allow, n - max(taps) of them
+	def _sequence(self, N):
+		n = self.n
+		s = np.zeros(max(N, n), dtype=np.uint8)
+		s[:n] = self.state
+		L = n - self.taps[-1]
+		for j in range(0, N - n, L):
+			l = min(L, N - n - j)
+			new = s[j:j+l].copy()
+			for k in self.taps[1:]:
+				new ^= s[j+k:j+k+l]
+			s[j+n:j+n+l] = new
+		return s[:N]
 
-''' RC4 - adaptation of RC4, a cryptographic stream-cipher pseudo-RNG '''
+''' _toint - bits (sequence of 0s and 1s)
+		returns the int whose bit d is bits[d]
+		'''
+def _toint(bits):
+	return int(''.join('1' if b else '0' for b in bits)[::-1] or '0', 2)
+
+''' RC4 - adaptation of RC4, a cryptographic stream-cipher pseudo-RNG
+		the state S is a permutation of 2**b values, kept as an array (uint8, for the usual b=8)
+		keystream values are generated in bulk, and each gives b bits, most significant first
+		'''
 class RC4:
 	''' RC4 - n (int), seed (list of ints)
 			PRE: len(seed) cannot exceed 2**b
@@ -132,34 +522,53 @@ class RC4:
 		self.n = n
 		
 		# Initialize state
-		self.S = range(2**b)
+		S = list(range(2**b))
 		j = 0
 		for i in range(2**b):
-			j = (j + self.S[i] + seed[i%len(seed)]) % (2**b)
-			self.S[i],self.S[j] = self.S[j],self.S[i]	# swap elements
+			j = (j + S[i] + seed[i%len(seed)]) % (2**b)
+			S[i],S[j] = S[j],S[i]	# swap elements
 		
+		self.S = np.array(S, dtype=(np.uint8 if b <= 8 else np.uint32))
 		self.b = b
 		self.i = 0
 		self.j = 0
-		self.buffer = ''
+		''' self.buffer: bits generated, but not yet returned '''
+		self.buffer = np.zeros(0, dtype=np.uint8)
 	
 	''' next - returns the next n-bit grouping of this generator '''
 	def next(self):
-		# if the buffer is not long enough, add the next byte-like block
-		while len(self.buffer) < self.n:
-			self.i = (self.i + 1) % (2**self.b)
-			self.j = (self.j + self.S[self.i]) % (2**self.b)
-			
-			self.S[self.i],self.S[self.j] = self.S[self.j],self.S[self.i]	# swap elements
-			self.buffer += np.binary_repr(
-								self.S[ (self.S[self.i]+self.S[self.j]) % (2**self.b)],
-								width=self.b )
+		return self.next_block(1)[0]
+	
+	''' next_block - k (int)
+			returns the next k n-bit groupings of this generator, as the rows of a k x n array
+			'''
+	def next_block(self, k):
+		b = self.b
+		need = k*self.n - len(self.buffer)
+		K = self._keystream(max(0, (need + b - 1) // b))
+		if b == 8:
+			bits = np.unpackbits(K)
+		else:
+			bits = ((K[:,np.newaxis] >> np.arange(b-1, -1, -1)) & 1).astype(np.uint8).reshape(-1)
+		bits = np.concatenate((self.buffer, bits))
+		self.buffer = bits[k*self.n:]
+		return bits[:k*self.n].reshape(k, self.n).astype(int)
+	
+	# returns the next N keystream values as an array, advancing the state
+	#	S is worked on as a list, since single elements of a list are much quicker to reach than of an array
+	def _keystream(self, N):
+		mask = 2**self.b - 1
+		S = self.S.tolist()
+		(i, j) = (self.i, self.j)
+		out = bytearray(N) if self.b == 8 else [0]*N
+		for r in range(N):
+			i = (i + 1) & mask
+			j = (j + S[i]) & mask
+			S[i],S[j] = S[j],S[i]	# swap elements
+			out[r] = S[(S[i] + S[j]) & mask]
 		
-		ret = self.buffer[:self.n]
-		self.buffer = self.buffer[self.n:]
-		return destrify(ret)
-
-
-
-
-
+		self.S[:] = S
+		(self.i, self.j) = (i, j)
+		if self.b == 8:
+			return np.frombuffer(bytes(out), dtype=np.uint8)
+		return np.array(out, dtype=np.int64)
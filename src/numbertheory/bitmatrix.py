@@ -0,0 +1,182 @@
+#!/usr/bin/env python
+
+import numpy as np
+
+''' STANDARD:    i identifies row, m the number of rows
+                 j identifies column, n the number of columns
+
+    binary matrices are bit-packed, row by row, into uint64 words:
+        column j of a row is bit (j % 64) of word (j // 64)
+    elimination uses the Method of Four Russians (M4RI):
+        k pivot columns are found at a time, a table of all 2**k sums of their rows is built,
+        and every other row is cleared of those k columns with a single table lookup
+    '''
+
+WORD = 64
+_bits_ = np.arange(WORD, dtype=np.uint64)
+_one_ = np.uint64(1)
+
+
+''' pack: M (array of 0s and 1s, any number of dimensions)
+        returns M with its last axis bit-packed into uint64 words
+        '''
+def pack(M):
+    M = np.asarray(M)
+    n = M.shape[-1]
+    W = (n + WORD - 1) // WORD
+    bits = np.zeros(M.shape[:-1] + (W*WORD,), dtype=np.uint64)
+    bits[..., :n] = M & 1
+    bits = bits.reshape(M.shape[:-1] + (W, WORD))
+    # bits within a word are disjoint, so summing them is the same as or-ing them
+    return (bits << _bits_).sum(axis=-1, dtype=np.uint64)
+
+''' unpack: P (uint64 array), n (int)
+        returns the first n bits of each packed row of P as a uint8 array
+        '''
+def unpack(P, n):
+    bits = (P[..., np.newaxis] >> _bits_) & _one_
+    bits = bits.reshape(P.shape[:-1] + (P.shape[-1]*WORD,))
+    return bits[..., :n].astype(np.uint8)
+
+''' column: P (uint64 array), j (int)
+        returns bit j of every packed row of P as a uint64 array
+        '''
+def column(P, j):
+    return (P[..., j // WORD] >> np.uint64(j % WORD)) & _one_
+
+
+''' echelon: P (2D uint64 array), n (int), [k] (int)
+        reduces the packed matrix P, of n columns, to reduced row-echelon form
+            k is the number of columns handled per table: defaults to roughly log2 of the rows
+        RETURN the reduced packed matrix and the list of pivot columns
+            row i of the result has its leading one in column pivots[i]
+        '''
+def echelon(P, n, k=None):
+    R = np.array(P, dtype=np.uint64)
+    m = R.shape[0]
+    if k is None:
+        k = max(1, min(8, int(np.log2(max(m, 2)))))
+
+    pivots = []
+    r = 0           # rows [0,r) are already pivots
+    j = 0           # columns [0,j) are already processed
+    while j < n and r < m:
+        # STEP ONE: FIND UP TO k PIVOTS, KEEPING THEM REDUCED AGAINST ONE ANOTHER
+        cols = []
+        while j < n and len(cols) < k and r + len(cols) < m:
+            rb = r + len(cols)                  # the next pivot goes in this row
+            bits = column(R[rb:], j)
+            if len(cols) > 0:                   # rows below don't yet account for this block's pivots
+                for (b, c) in enumerate(cols):
+                    if column(R[r+b], j):
+                        bits ^= column(R[rb:], c)
+            rows = np.flatnonzero(bits)
+            if len(rows) > 0:
+                ii = rb + rows[0]
+                if ii > rb:
+                    R[[rb,ii],:] = R[[ii,rb],:]
+                for (b, c) in enumerate(cols):  # clear this block's earlier pivot columns from the new row
+                    if column(R[rb], c):
+                        R[rb] ^= R[r+b]
+                for b in range(len(cols)):      # and clear the new pivot column from the earlier rows
+                    if column(R[r+b], j):
+                        R[r+b] ^= R[rb]
+                cols.append(j)
+            j += 1
+        if len(cols) == 0:
+            break
+
+        # STEP TWO: TABULATE EVERY SUM OF THE BLOCK'S PIVOT ROWS
+        block = R[r:r+len(cols)]
+        table = np.zeros((2**len(cols), R.shape[1]), dtype=np.uint64)
+        for b in range(len(cols)):
+            table[2**b:2**(b+1)] = table[:2**b] ^ block[b]
+
+        # STEP THREE: CLEAR THE BLOCK'S PIVOT COLUMNS FROM EVERY OTHER ROW AT ONCE
+        others = np.r_[0:r, r+len(cols):m]
+        index = np.zeros(len(others), dtype=np.uint64)
+        for (b, c) in enumerate(cols):
+            index |= column(R[others], c) << np.uint64(b)
+        R[others] ^= table[index.astype(np.intp)]
+
+        pivots += cols
+        r += len(cols)
+
+    return R, pivots
+
+
+''' rank: M (2D array of 0s and 1s)
+        returns the rank of M over GF(2)
+        '''
+def rank(M):
+    M = np.asarray(M)
+    if M.shape[0] > M.shape[1]:     # fewer, longer rows pack better
+        M = M.T
+    (R, pivots) = echelon(pack(M), M.shape[1])
+    return len(pivots)
+
+''' ranks: T (3D array of 0s and 1s)
+        returns the rank over GF(2) of each matrix T[b], as an int array
+            all the matrices are eliminated together, one column at a time
+        '''
+def ranks(T):
+    T = np.asarray(T)
+    (N,m,n) = T.shape
+    P = pack(T)
+    batch = np.arange(N)
+    used = np.zeros((N,m), dtype=bool)          # rows already chosen as pivots
+    r = np.zeros(N, dtype=int)
+
+    for j in range(n):
+        bits = column(P, j).astype(bool)
+        candidates = bits & ~used
+        has = candidates.any(axis=1)            # matrices with a pivot in column j
+        piv = candidates.argmax(axis=1)         # first such row, in each matrix
+        # XOR each pivot row into every other row of its matrix with a one in column j
+        mask = bits & has[:,np.newaxis]
+        mask[batch, piv] = False
+        P ^= np.where(mask[...,np.newaxis], P[batch, piv][:,np.newaxis,:], np.uint64(0))
+        used[batch[has], piv[has]] = True
+        r += has
+    return r
+
+''' hasfullrank: M (2D array of 0s and 1s)
+        returns True iff M has rank min(m,n) over GF(2)
+        '''
+def hasfullrank(M):
+    return rank(M) == min(np.shape(M))
+
+''' solve: A (2D array of 0s and 1s), b (1D array of 0s and 1s)
+        finds the unique solution to A*x=b over GF(2)
+            if A does not have rank n (the number of unknowns), or the system is inconsistent,
+            returns None instead
+        '''
+def solve(A, b):
+    A = np.asarray(A)
+    (m,n) = A.shape
+    if m < n:       # IF COLUMNS OUTNUMBER ROWS, OBVIOUSLY NO UNIQUE SOLUTION
+        return None
+    AUG = np.concatenate((A, np.reshape(b, (m,1))), axis=1)
+    (R, pivots) = echelon(pack(AUG), n+1)
+    if pivots != list(range(n)):    # a missing pivot is a free variable, and a pivot at n a contradiction
+        return None
+    return column(R[:n], n).astype(np.uint8)
+
+''' nullspace: M (2D array of 0s and 1s)
+        returns a basis for the nullspace of M over GF(2),
+            as a 2D uint8 array with one basis vector per row
+        '''
+def nullspace(M):
+    M = np.asarray(M)
+    (m,n) = M.shape
+    (R, pivots) = echelon(pack(M), n)
+    bound = set(pivots)
+    free = [j for j in range(n) if j not in bound]
+
+    N = np.zeros((len(free), n), dtype=np.uint8)
+    for (f, j) in enumerate(free):
+        # setting free variable j to 1 forces each pivot variable to the entry of its row in column j
+        N[f, j] = 1
+        if len(pivots) > 0:
+            N[f, pivots] = column(R[:len(pivots)], j)
+    return N
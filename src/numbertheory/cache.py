@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+
+from collections import OrderedDict
+
+from field import FiniteField as GF
+
+''' Fields are expensive to build (with their log/antilog tables) but never change,
+        so they are kept here in a least-recently-used cache, keyed by order
+    RS parity-check matrices need no cache: code.syndrome_RS and code.decode_RS never build them
+    '''
+
+
+''' LRU: dictionary which forgets its least-recently-used items beyond a memory bound '''
+class LRU:
+    ''' LRU: [maxbytes] (int), [maxitems] (int)
+            maxbytes bounds the total (estimated) size of the values kept
+            maxitems bounds the number of values kept
+            either bound may be None, for no bound
+            '''
+    def __init__(self, maxbytes=None, maxitems=None):
+        self.maxbytes = maxbytes
+        self.maxitems = maxitems
+        ''' self.nbytes: total size of the values kept '''
+        self.nbytes = 0
+        ''' self._items_: key:(value,size), in order from least to most recently used '''
+        self._items_ = OrderedDict()
+
+    ''' get: key, [default]
+            returns the value for key, marking it most recently used,
+                or default if key is not kept
+            '''
+    def get(self, key, default=None):
+        if key not in self._items_:
+            return default
+        item = self._items_.pop(key)
+        self._items_[key] = item
+        return item[0]
+
+    ''' put: key, value, [size] (int)
+            keeps value for key, then forgets old values until both bounds hold again
+                the value just put is never forgotten, even if it alone breaks a bound
+            '''
+    def put(self, key, value, size=0):
+        if key in self._items_:
+            self.nbytes -= self._items_.pop(key)[1]
+        self._items_[key] = (value, size)
+        self.nbytes += size
+        while len(self._items_) > 1 and ((self.maxbytes is not None and self.nbytes > self.maxbytes)
+                                         or (self.maxitems is not None and len(self._items_) > self.maxitems)):
+            (k, (v, s)) = self._items_.popitem(last=False)
+            self.nbytes -= s
+
+    ''' keys: returns the keys kept, from least to most recently used '''
+    def keys(self):
+        return list(self._items_)
+
+    ''' clear: forgets everything '''
+    def clear(self):
+        self._items_.clear()
+        self.nbytes = 0
+
+    ''' key in LRU iff its value is kept '''
+    def __contains__(self, key):
+        return key in self._items_
+
+    ''' len(LRU) is the number of values kept '''
+    def __len__(self):
+        return len(self._items_)
+
+
+
+''' fields: cache of FiniteFields, keyed by order
+        bounded by what their tables and elements take up (see _size), as well as by number
+        '''
+fields = LRU(maxbytes=2**28, maxitems=32)
+''' FIELD_BYTES, TABLE_BYTES, ELEMENT_BYTES: rough sizes of a field, of each entry of its
+        log/antilog tables (as lists and as int64 arrays), and of each element it holds as a Polynomial
+        '''
+FIELD_BYTES = 2**12
+TABLE_BYTES = 72
+ELEMENT_BYTES = 180
+
+
+''' field: q (int)
+        returns GF(q), building it only if it isn't cached
+        its size is estimated again each time, since tables and elements are only built as they are used
+        '''
+def field(q):
+    F = fields.get(q)
+    if F is None:
+        F = GF(q)
+    fields.put(q, F, _size(F))
+    return F
+
+''' _size: F (FiniteField)
+        returns an estimate of the bytes F takes up: its tables, if they are built, and the elements it holds
+        '''
+def _size(F):
+    size = FIELD_BYTES + len(F._elems_) * ELEMENT_BYTES
+    if F._exp_ is not None:
+        size += F.order * TABLE_BYTES
+    return size
@@ -2,8 +2,13 @@
 
 import numpy as np
 
+import bitmatrix
 from field import FiniteField as GF
-from linalg import Matrix
+from linalg import Matrix, solve
+from polynomial import Polynomial
+
+''' BLOCK: most table lookups syndrome_RS makes at once '''
+BLOCK = 2**20
 
 ''' RS: q (int or FiniteField), t (int)
         returns parity-check matrix of an RS code 
@@ -17,20 +22,294 @@ def RS(q, shape):
         q = F.order
     else:
         F = GF(q)
-    a = F.alpha()
     
     (t,n) = shape
     
-    H = np.full((t,n), F.one, dtype=type(F.one))
+    H = np.empty((t,n), dtype=(int if F.isintegerfield() else object))
+    
+    # EASY CASE: ELEMENT (i,j) IS a**((i+1)*j), WHICH IS ONE LOOKUP IN THE ANTILOG TABLE
+    if F.tables():
+        for i in range(t):
+            for j in range(n):
+                H[i,j] = F.decode(F._exp_[((i+1)*j) % (q-1)])
+        return Matrix(H,F)
     
     # STEP ONE - FILL THE FIRST ROW: H_0j = a**j
+    a = F.alpha()
+    H.fill(F.one)
     for j in range(1, n):
-        H[0,j] = F[a*H[0,j-1]]
+        H[0,j] = F.mul(a, H[0,j-1])
     
     # STEP TWO - FILL THE REST
     for j in range(1, n):
         apow = H[0,j]
         for i in range(1,t):
-            H[i,j] = F[apow*H[i-1,j]]
+            H[i,j] = F.mul(apow, H[i-1,j])
+    
+    return Matrix(H,F)
+
+
+''' syndrome: H (Matrix), x (1d-array)
+        sender side of an erasure protocol: returns the syndrome H*x of word x, as a 1d-array
+        '''
+def syndrome(H, x):
+    return (H * Matrix(x,H.F).T()).M[:,0]
+
+''' syndrome_RS: F (FiniteField), x (1d-array), t (int)
+        returns the same syndrome as syndrome(RS(F,(t,len(x))), x), without building the RS matrix:
+            row i of that matrix holds the powers of alpha**(i+1),
+            so the syndrome is x(z) = x_0 + x_1 z + x_2 z**2 + ... at z = alpha**1 ... alpha**t
+        with log/antilog tables, term j at alpha**i is exp[log(x_j) + i*j], so every term is
+            one vectorized lookup, taken BLOCK entries at a time and summed over j
+            which is O(t*n): so over GF(2^m), once t*n outgrows q*m**2, x is instead evaluated at every
+            point of the field by the additive FFT (see _additive_fft), in O(q*m**2), and alpha**1 ... alpha**t picked out
+        in GF(p), Horner's rule runs over all t points at once instead
+        x may also be an int array of encodings (see FiniteField.encode), so no element objects are needed
+        '''
+def syndrome_RS(F, x, t):
+    n = len(x)
+    encoded = _encoded(F, x)
+    
+    if F.isintegerfield():
+        p = F.p
+        dtype = np.int64 if p < 2**31 else object   # so products of residues don't overflow
+        a = F.alpha()
+        z = np.array([pow(a, i, p) for i in range(1, t+1)], dtype=dtype)
+        S = np.zeros(t, dtype=dtype)
+        for j in range(n-1, -1, -1):
+            S = (S*z + int(x[j])) % p
+        return S.astype(int) if dtype is np.int64 else S
+    
+    S = np.empty(t, dtype=object)
+    if not F.tables():          # too big for tables: Horner's rule, one point at a time
+        if encoded:
+            x = [F.decode(int(e)) for e in x]
+        a = F.alpha()
+        z = a
+        for i in range(t):
+            S[i] = F.zero
+            for j in range(n-1, -1, -1):
+                S[i] = F.add(F.mul(S[i], z), x[j])
+            z = F.mul(z, a)
+        return S
+    
+    (exp, log) = F.arrays()
+    E = x.astype(np.int64) if encoded else np.array([F.encode(v) for v in x], dtype=np.int64)
+    nz = np.flatnonzero(E)              # zero symbols add nothing, and have no log
+    (L, js) = (log[E[nz]], nz)
+    i = np.arange(1, t+1, dtype=np.int64)
+    
+    if F.p == 2 and n <= F.order and t*len(js) > F.order*F.m**2:     # cheaper to evaluate x everywhere
+        s = _additive_fft(F, E)[exp[i % (F.order-1)]]
+        for k in range(t):
+            S[k] = F.decode(int(s[k]))
+        return S
+    
+    block = max(1, BLOCK // max(t, 1))
+    s = np.zeros(t, dtype=np.int64)
+    for b in range(0, len(js), block):
+        T = exp[(L[b:b+block] + np.outer(i, js[b:b+block])) % (F.order-1)]
+        if F.p == 2:        # addition in GF(2^m) is xor of encodings
+            s ^= np.bitwise_xor.reduce(T, axis=1)
+        else:               # otherwise, add the base-p digits of the encodings separately
+            s = _add_digits(F, np.concatenate((s[:,np.newaxis], T), axis=1))
+    for k in range(t):
+        S[k] = F.decode(int(s[k]))
+    return S
+
+''' decode: H (Matrix), s (1d-array), y (1d-array), locs (list of ints)
+        receiver side of an erasure protocol:
+            y is the received word, whose symbols at locs are erased, and s is the syndrome of x
+        only the unerased symbols of y are used for the right-hand side, s - H[:,kept]*y[kept],
+            and only the c by t system H[:,locs]*e = s - H[:,kept]*y[kept] is solved
+        RETURN the reconstructed word, with e in the erased symbols,
+            or None if the system does not have a unique solution
+        '''
+def decode(H, s, y, locs):
+    (locs, z) = _residual(H, s, y, locs)
+    
+    if H.F.order == 2:
+        e = bitmatrix.solve(H.M[:,locs], z)
+    else:
+        e = solve(H[:,locs], Matrix(z,H.F).T())
+    if e is None:
+        return None
+    
+    X = np.copy(y)
+    X[locs] = e
+    return X
+
+''' decode_RS: F (FiniteField), s (1d-array), y (1d-array), locs (list of ints)
+        as decode, for an RS parity-check matrix (see RS) with len(s) rows, but neither H nor any system is needed:
+            column k of H is X_k, X_k**2, ... X_k**t for X_k = alpha**k,
+            so the residual z = s - syndrome_RS(y without its erasures) is the syndrome of the erased symbols e alone
+        with the erasure locator L(x) = (1 - X_k x)*... over locs,
+            and the evaluator W(x) = z(x)*L(x) mod x**t, where z(x) = z_0 + z_1 x + ...,
+            Forney's formula gives each erased symbol as e_k = -W(1/X_k) / L'(1/X_k)
+        this is O(t*c) field operations, where solve takes O(t*c**2)
+        y may also be an int array of encodings, as for syndrome_RS, and then so is the result
+        RETURN the reconstructed word, or None if there are more than t erasures
+        '''
+def decode_RS(F, s, y, locs):
+    t = len(s)
+    c = len(locs)
+    if c > t:       # IF ERASURES OUTNUMBER SYNDROME SYMBOLS, OBVIOUSLY NO UNIQUE SOLUTION
+        return None
+    encoded = _encoded(F, y)
+    y0 = np.copy(y)
+    for k in locs:
+        y0[k] = 0 if encoded else F.zero
+    z = [F.sub(si, ri) for (si, ri) in zip(s, syndrome_RS(F, y0, t))]
+    a = F.alpha()
+    Xs = [F.decode(F._exp_[k % (F.order-1)]) if F.tables() else _power(F, a, k) for k in locs]
+    
+    # STEP ONE: ERASURE LOCATOR L, ONE FACTOR (1 - X_k x) AT A TIME
+    L = [F.one]
+    for Xk in Xs:
+        L = [F.sub(l, F.mul(Xk, lp)) for (l, lp) in zip(L + [F.zero], [F.zero] + L)]
+    
+    # STEP TWO: ERASURE EVALUATOR W = z*L mod x**t, AND THE FORMAL DERIVATIVE OF L
+    W = [F.zero]*t
+    for i in range(t):
+        for j in range(min(i, c)+1):
+            W[i] = F.add(W[i], F.mul(z[i-j], L[j]))
+    dL = [_times(F, i, L[i]) for i in range(1, c+1)]
     
-    return Matrix(H,F)
\ No newline at end of file
+    # STEP THREE: FORNEY'S FORMULA AT EACH ERASURE
+    e = []
+    for Xinv in F.inv_many(Xs):
+        d = _horner(F, dL, Xinv)
+        if d == F.zero:     # two erasures share a locator: the word is too long for its field
+            return None
+        e.append(F.neg(F.mul(_horner(F, W, Xinv), F.inv(d))))
+    
+    X = np.copy(y)
+    for (k, ek) in zip(locs, e):
+        X[k] = F.encode(ek) if encoded else ek
+    return X
+
+''' _encoded: F (FiniteField), x (1d-array)
+        returns True iff x holds the int encodings of elements of GF(p^m), rather than the elements
+        '''
+def _encoded(F, x):
+    return not F.isintegerfield() and isinstance(x, np.ndarray) and x.dtype.kind in 'iu'
+
+''' _residual: H (Matrix), s (1d-array), y (1d-array), locs (list of ints)
+        returns locs as an int array, and the residual s - H[:,kept]*y[kept] as a 1d-array
+        '''
+def _residual(H, s, y, locs):
+    locs = np.asarray(locs, dtype=int)
+    kept = np.setdiff1d(np.arange(len(y)), locs)
+    
+    if H.F.order == 2:      # over GF(2), H[:,kept]*y[kept] is the sum of the columns where y is 1
+        ones = kept[np.asarray(y)[kept] == 1]
+        return locs, (np.asarray(s) + H.M[:,ones].sum(axis=1)) & 1
+    z = Matrix(s,H.F).T()
+    if len(kept) > 0:
+        z = z - H[:,kept] * Matrix(y[kept],H.F).T()
+    return locs, z.M[:,0]
+
+''' _additive_fft: F (FiniteField), E (1d int array)
+        returns the encodings of x(z) at every z in GF(2^m), where E holds the encodings of x_0, x_1, ...
+            entry k of the result is x at the element encoded by k
+        GF(2^m) is the span of 1, x, ... x**(m-1) over GF(2) (the bits of the encodings),
+            so the additive FFT of Gao and Mateer over that basis gives every point at once
+            in O(q log(q)**2) additions and O(q log(q)) products
+        PRE: F has tables, F.p == 2, and len(E) <= F.order
+        '''
+def _additive_fft(F, E):
+    A = np.zeros((1, F.order), dtype=np.int64)
+    A[0,:len(E)] = E
+    return _fft(F, A, [1 << i for i in range(F.m)])[0]
+
+''' _fft: F (FiniteField), A (2d int array), basis (list of ints)
+        returns each row of A (the encodings of the coefficients of a polynomial of degree < 2**len(basis))
+            evaluated at every sum of a subset of basis: entry k at the sum of the elements picked by the bits of k
+        every row has the same basis, so all of them are done together at each level of the recursion
+        '''
+def _fft(F, A, basis):
+    if not basis:
+        return A
+    (exp, log) = F.arrays()
+    b = basis[-1]
+    gammas = [int(exp[(log[g] - log[b]) % (F.order-1)]) for g in basis[:-1]]
+    deltas = [int(exp[(2*log[g]) % (F.order-1)]) ^ g for g in gammas]
+    
+    # STEP ONE: g(x) = f(b*x), SO THE POINTS ARE THE SUBSET SUMS OF THE GAMMAS AND 1
+    A = _mul(F, A, exp[(log[b] * np.arange(A.shape[1])) % (F.order-1)])
+    
+    # STEP TWO: g(x) = g0(x**2 + x) + x*g1(x**2 + x), AND G**2 + G IS A SUBSET SUM OF THE DELTAS
+    T = _taylor(A)
+    U = _fft(F, np.concatenate((T[:,0::2], T[:,1::2])), deltas)
+    (u, v) = (U[:len(A)], U[len(A):])
+    
+    # STEP THREE: g(G) = g0(G**2 + G) + G*g1(G**2 + G), AND g(G+1) = g(G) + g1(G**2 + G)
+    G = np.zeros(1, dtype=np.int64)
+    for g in gammas:
+        G = np.concatenate((G, G ^ g))
+    w = u ^ _mul(F, v, G)
+    return np.concatenate((w, w ^ v), axis=1)
+
+''' _taylor: A (2d int array)
+        returns the Taylor expansion of each row of A (coefficients over GF(2^m), a power of 2 of them)
+            at x**2 + x: row f becomes h_0, h_1, ..., the coefficients of f = h_0 + h_1 x + (h_2 + h_3 x)(x**2 + x) + ...
+        splits f = f0 + x**(2k) f1 + x**(3k) f2 into g0 + (x**2 + x)**k g1, and expands g0 and g1 together
+        '''
+def _taylor(A):
+    n = A.shape[1]
+    if n <= 2:
+        return A
+    k = n // 4
+    (f0, f1, f2) = (A[:,:2*k], A[:,2*k:3*k], A[:,3*k:])
+    h = f1 ^ f2
+    g0 = np.copy(f0)
+    g0[:,k:] ^= h
+    T = _taylor(np.concatenate((g0, np.concatenate((h, f2), axis=1))))
+    return np.concatenate((T[:len(A)], T[len(A):]), axis=1)
+
+''' _mul: F (FiniteField), a (int array), b (int array)
+        returns the encodings of the products of the elements encoded by a and b (broadcast), for F with tables
+        '''
+def _mul(F, a, b):
+    (exp, log) = F.arrays()
+    return np.where((a != 0) & (b != 0), exp[(log[a] + log[b]) % (F.order-1)], 0)
+
+''' _add_digits: F (FiniteField), T (2d int array)
+        returns the encoding of the sum of each row of encodings in T, for GF(p^m)
+        '''
+def _add_digits(F, T):
+    s = np.zeros(T.shape[0], dtype=np.int64)
+    for k in range(F.m - 1, -1, -1):
+        s = s*F.p + ((T // F.p**k) % F.p).sum(axis=1) % F.p
+    return s
+
+''' _horner: F (FiniteField), P (list of elements), x (element)
+        returns the polynomial with coefficients P (lowest power first) evaluated at x
+        '''
+def _horner(F, P, x):
+    r = F.zero
+    for v in reversed(P):
+        r = F.add(F.mul(r, x), v)
+    return r
+
+''' _power: F (FiniteField), a (element), k (int)
+        returns a**k in F, by square-and-multiply
+        '''
+def _power(F, a, k):
+    r = F.one
+    while k > 0:
+        if k & 1:
+            r = F.mul(r, a)
+        k >>= 1
+        if k > 0:
+            a = F.mul(a, a)
+    return r
+
+''' _times: F (FiniteField), k (int), v (element)
+        returns v added to itself k times in F
+        '''
+def _times(F, k, v):
+    k %= F.p
+    if F.isintegerfield():
+        return (k * v) % F.p
+    return F.zero if k == 0 else v * Polynomial([k], F.GF_p)     # each coefficient times k
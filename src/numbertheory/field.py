@@ -1,8 +1,18 @@
 #!/usr/bin/env python
 
+import numbers
+import itertools
+import numpy as np
+
 import numbertheory as nt
+import gf2x
 from polynomial import Polynomial
 
+''' TABLE_LIMIT: largest order for which log/antilog tables are built
+		beyond this, arithmetic falls back to reducing Polynomials by P
+		'''
+TABLE_LIMIT = 2**20
+
 ''' FiniteField: immutable finite field for performing algebraic operations '''
 class FiniteField:
 	''' FiniteField: p, [m] (both ints)
@@ -24,6 +34,8 @@ class FiniteField:
 		''' self.p: the characteristic of the field
 					IE the smallest n for which n*x=0 for ALL x in field '''		
 		self.p = p
+		''' self.m: the power of the characteristic, IE the dimension over GF(p) '''
+		self.m = m
 		''' self.order: the number of elements in the field '''
 		self.order = p**m
 		
@@ -42,14 +54,24 @@ class FiniteField:
 		else:
 			self.GF_p = FiniteField(p)
 			# GF(p^m) is Z_p[x]/P(x), where P is an irreducible polynomial of degree m in Z_p[x]
-			self.P = nt.nextirreducible(Polynomial({0:1, m:1}, self.GF_p))
+			self.P = nt.irreducible(self.GF_p, m)
 			self.zero = Polynomial({0:0}, self.GF_p)
 			self.one = Polynomial({0:1}, self.GF_p)
 		
-		''' self._neg_: holds additive inverses. built as needed '''
-		self._neg_ = {}
-		''' self._inv_: holds multiplicative inverses. built as needed '''
-		self._inv_ = {}
+		''' self._exp_: antilog table, _exp_[i] is the integer encoding of alpha^i. built as needed '''
+		self._exp_ = None
+		''' self._log_: log table, _log_[e] is the i for which alpha^i has encoding e. built as needed '''
+		self._log_ = None
+		''' self._arrays_: the same two tables as int64 numpy arrays, for vectorized lookups. built as needed '''
+		self._arrays_ = None
+		''' self._elems_: holds elements by their integer encoding. built as needed '''
+		self._elems_ = {}
+		''' self._alpha_: integer encoding of the first primitive element. found as needed '''
+		self._alpha_ = None
+		''' self._mod_: for GF(2^m), (P, sparse(P)) as ints for gf2x.mulmod. None otherwise '''
+		self._mod_ = None
+		if p == 2 and m > 1:
+			self._mod_ = (int(self.P), gf2x.sparse(int(self.P)))
 	
 	''' isintegerfield: returns True iff elements of this field are ints (as opposed to Polynomials) '''
 	def isintegerfield(self):
@@ -60,16 +82,162 @@ class FiniteField:
 	
 	''' alpha: returns the first primitive element of this field '''
 	def alpha(self):
-		for a in self:	# this goes through zero, too, but meh...
-			apow = self.one		# a^i starts at a^0 == 1
-			for i in range(1, self.order-1):
-				apow = self[a*apow]
-				if apow == self.one:
+		return self.decode(self._generator_())
+	
+	''' _generator_: no parameters
+			returns the integer encoding of the first primitive element of this field
+			if P is primitive, that is x; otherwise each element is tested in turn:
+				g is primitive iff g**((order-1)/r) != 1 for each prime r dividing order-1
+			'''
+	def _generator_(self):
+		if self._alpha_ is not None:
+			return self._alpha_
+		
+		N = self.order - 1
+		if N == 1:						# GF(2) is generated by 1
+			self._alpha_ = 1
+		elif not self.isintegerfield() and nt.isprimitive(self.P):
+			self._alpha_ = self.p		# x is encoded as p, and constants (encoded below p) never generate
+		else:
+			rs = list(nt.primefactor(N))
+			for g in itertools.count(2):
+				if all(self._ipow_(g, N//r) != 1 for r in rs):
+					self._alpha_ = g
 					break
-			else:		# this goes if 1 hasn't been seen yet OR if loop never ran (ie GF(2))
-				apow = self[a*apow]		# a^(order-1) SHOULD be 1
-				if apow == self.one:
-					return a
+		return self._alpha_
+	
+	
+	
+	# TABLE ENGINE
+	#	elements of GF(p^m) are encoded as the ints 0..order-1 (see int(Polynomial)),
+	#	so that once the log/antilog tables exist, arithmetic is just a few lookups
+	
+	''' encode: x (int or Polynomial)
+			returns the integer encoding of element x
+			'''
+	def encode(self, x):
+		if self.isintegerfield():
+			return x % self.p
+		return int(x)
+	
+	''' decode: e (int)
+			returns the element whose integer encoding is e
+			'''
+	def decode(self, e):
+		if self.isintegerfield():
+			return e % self.p
+		if e in self._elems_:
+			return self._elems_[e]
+		x = Polynomial(e, self.GF_p)	# base-p digits are the coefficients, lowest power first
+		if self.order <= TABLE_LIMIT:	# beyond that, there are too many elements to keep
+			self._elems_[e] = x
+		return x
+	
+	''' tables: no parameters
+			builds the log/antilog tables for this field, if they aren't built already
+			returns True iff the tables are available
+				(never for GF(p), which needs none, or for fields larger than TABLE_LIMIT)
+			'''
+	def tables(self):
+		if self._exp_ is not None:
+			return True
+		if self.isintegerfield() or self.order > TABLE_LIMIT:
+			return False
+		
+		# the first primitive element, in order of encoding, generates the antilog table
+		g = self._generator_()
+		exp = [1]
+		for i in range(self.order-2):
+			exp.append(self._imul_(exp[-1], g))
+		
+		log = [0]*self.order
+		for i in range(len(exp)):
+			log[exp[i]] = i
+		
+		self._exp_ = exp
+		self._log_ = log
+		return True
+	
+	''' arrays: no parameters
+			returns the antilog and log tables as int64 numpy arrays, building them if needed
+				or None if this field has no tables (see tables)
+			'''
+	def arrays(self):
+		if self._arrays_ is None and self.tables():
+			self._arrays_ = (np.array(self._exp_, dtype=np.int64), np.array(self._log_, dtype=np.int64))
+		return self._arrays_
+	
+	''' _imul_: a (int), b (int)
+			returns the encoding of the product of the elements encoded by a and b
+			uses shift-and-add multiplication, reducing by P at each shift: O(m**2)
+			only meant for building the tables and finding generators
+			'''
+	def _imul_(self, a, b):
+		p = self.p
+		m = self.m
+		if m == 1:
+			return (a * b) % p
+		if p == 2:				# binary case: add is xor, and the digits are simply bits
+			return gf2x.mulmod(a, b, *self._mod_)
+		
+		A = [(a // p**i) % p for i in range(m)]
+		B = [(b // p**i) % p for i in range(m)]
+		Pd = [self.P[i] for i in range(m)]		# P is monic, so only its lower digits matter
+		R = [0]*m
+		for d in B:
+			R = [(r + d*v) % p for (r, v) in zip(R, A)]
+			c = A[-1]							# multiply A by x, subtracting c*P to reduce
+			A = [0] + A[:-1]
+			A = [(v - c*w) % p for (v, w) in zip(A, Pd)]
+		return sum(R[i] * p**i for i in range(m))
+	
+	''' _ipow_: a (int), e (int)
+			returns the encoding of the e-th power of the element encoded by a
+			uses square-and-multiply: O(log e) calls to _imul_
+			'''
+	def _ipow_(self, a, e):
+		r = 1
+		while e > 0:
+			if e & 1:
+				r = self._imul_(r, a)
+			e >>= 1
+			if e > 0:
+				a = self._imul_(a, a)
+		return r
+	
+	''' add: x, y (both int or Polynomial)
+			returns x + y in this field
+			'''
+	def add(self, x, y):
+		if self.isintegerfield():
+			return (x + y) % self.p
+		return x + y		# sums of reduced polynomials need no further reduction
+	
+	''' sub: x, y (both int or Polynomial)
+			returns x - y in this field
+			'''
+	def sub(self, x, y):
+		if self.isintegerfield():
+			return (x - y) % self.p
+		return x - y
+	
+	''' mul: x, y (both int or Polynomial)
+			returns x * y in this field
+			uses the log/antilog tables when available, and reduces by P otherwise
+				(over GF(2^m), by carry-less multiplication of the encodings: see gf2x)
+			'''
+	def mul(self, x, y):
+		if self.isintegerfield():
+			return (x * y) % self.p
+		if not self.tables():
+			if self._mod_ is not None:
+				return self.decode(gf2x.mulmod(int(x), int(y), *self._mod_))
+			return self[x * y]
+		a = self.encode(x)
+		b = self.encode(y)
+		if a == 0 or b == 0:
+			return self.zero
+		return self.decode(self._exp_[(self._log_[a] + self._log_[b]) % (self.order-1)])
 	
 	
 	
@@ -77,48 +245,98 @@ class FiniteField:
 	
 	''' neg: x (int or Polynomial)
 			returns the additive inverse of element x
-			uses a very naive iterative search, but stores results dynamically
+			in GF(p) that is p-x, and in GF(p^m) each coefficient is negated in GF(p)
 			'''
 	def neg(self, x):
 		if x not in self:
 			raise TypeError(str(x)+" is not an element of "+str(self))
-		if x in self._neg_:
-			return self._neg_[x]
-		for e in self:
-			if e in self._neg_:
-				if self._neg_[e] == x:
-					self._neg_[x] = e
-					return e
-			else:
-				y = self[ x + e ]
-				if y == self.zero:
-					self._neg_[x] = e
-					return e
-		# we're guaranteed to have returned something, since we're in a field
+		if self.isintegerfield():
+			return (-x) % self.p
+		return -x			# negating the coefficients of a reduced polynomial leaves it reduced
 	
 	
 	''' inv: x (int or Polynomial)
 			returns the multiplicative inverse of element x
-			uses a very naive iterative search, but stores results dynamically
+				in GF(p), by Fermat: x**(p-2) = x**-1
+				in GF(p^m), from the log/antilog tables when available,
+				and otherwise by the extended Euclidean algorithm against P
 			'''
 	def inv(self, x):
 		if x not in self:
 			raise TypeError(str(x)+" is not an element of "+str(self))
-		if x == self.zero:
+		if x == self.zero or (self.isintegerfield() and x % self.p == 0):
 			raise ZeroDivisionError("0 does not have an inverse. Ever.")
-		if x in self._inv_:
-			return self._inv_[x]
-		for e in self:
-			if e in self._inv_:
-				if self._inv_[e] == x:
-					self._inv_[x] = e
-					return e
-			else:
-				y = self[ x * e ]
-				if y == self.one:
-					self._inv_[x] = e
-					return e
-		# we're guaranteed to have returned something, since we're in a field
+		if self.isintegerfield():
+			return pow(int(x), self.p-2, self.p)
+		if self.tables():		# alpha^-i is alpha^(order-1-i)
+			return self.decode(self._exp_[-self._log_[self.encode(x)] % (self.order-1)])
+		if self._mod_ is not None:
+			return self.decode(gf2x.inv(int(x), self._mod_[0]))
+		return nt.polyinverse(x, self.P)
+	
+	''' neg_many: X (array or list of elements)
+			returns an array of the additive inverses of each element of X
+			'''
+	def neg_many(self, X):
+		X = self._array_(X)
+		if self.isintegerfield():
+			return (-X) % self.p
+		if self.p == 2:
+			return X.copy()
+		R = np.empty(X.shape, dtype=object)
+		for i in np.ndindex(X.shape):
+			R[i] = -X[i]
+		return R
+	
+	''' inv_many: X (array or list of elements)
+			returns an array of the multiplicative inverses of each element of X
+				in GF(p), every Fermat power is taken at once
+				in GF(p^m), each is looked up in the log/antilog tables, or found as by inv
+			'''
+	def inv_many(self, X):
+		X = self._array_(X)
+		if self.isintegerfield():
+			E = X % self.p
+			if (E == 0).any():
+				raise ZeroDivisionError("0 does not have an inverse. Ever.")
+			if self.p >= 2**31:		# products of residues could overflow int64
+				return np.vectorize(lambda e: pow(int(e), self.p-2, self.p), otypes=[object])(E)
+			R = np.ones(E.shape, dtype=np.int64)
+			e = self.p - 2
+			while e > 0:
+				if e & 1:
+					R = (R * E) % self.p
+				e >>= 1
+				if e > 0:
+					E = (E * E) % self.p
+			return R
+		
+		R = np.empty(X.shape, dtype=object)
+		if self.tables():
+			N = self.order - 1
+			for i in np.ndindex(X.shape):
+				e = self.encode(X[i])
+				if e == 0:
+					raise ZeroDivisionError("0 does not have an inverse. Ever.")
+				R[i] = self.decode(self._exp_[-self._log_[e] % N])
+			return R
+		for i in np.ndindex(X.shape):
+			R[i] = self.inv(X[i])
+		return R
+	
+	''' _array_: X (array or list of elements)
+			returns X as an array (of ints in GF(p), and objects in GF(p^m))
+				elements are placed one by one, since numpy would try to unpack Polynomials
+			'''
+	def _array_(self, X):
+		if isinstance(X, np.ndarray):
+			return X
+		if self.isintegerfield():
+			return np.array(X, dtype=np.int64)
+		A = np.empty(len(X), dtype=object)
+		for i in range(len(X)):
+			A[i] = X[i]
+		return A
 	
 	
 	''' GF1 == GF2 iff they have the same order. That's proven somewhere... '''
@@ -137,16 +355,19 @@ class FiniteField:
 	def __getitem__(self, key):
 		if key not in self:
 			raise TypeError(str(key)+" is not an element of "+str(self))
+		if self._mod_ is not None:
+			(P, S) = self._mod_
+			return self.decode(gf2x.mod(int(key), P) if S is None else gf2x.reduce(int(key), S[0], S[1]))
 		
 		return key % self.P		# if field is GF(p^m), key % P is a polynomial
 	
 	''' v in FiniteField if v is equivalent to some element of the field:
-			order is characteristic (so GF(n)=Z_p), and v is int... OR
+			order is characteristic (so GF(n)=Z_p), and v is int (numpy ints included)... OR
 			m > 1 and v is Polynomial with coefficient field = GF(p)
 			'''
 	def __contains__(self, v):
 		if self.isintegerfield():
-			return isinstance(v, int)
+			return isinstance(v, numbers.Integral)
 		if self.order > self.p:
 			return isinstance(v, Polynomial) and v.F.order == self.p
 		return False
@@ -0,0 +1,146 @@
+#!/usr/bin/env python
+
+''' STANDARD:	polynomials over GF(2) are packed into (arbitrarily long) ints:
+					bit d of the int is the coefficient of x**d
+				so addition and subtraction are both xor, and the degree is bit_length()-1
+
+	multiplication is carry-less: a is tabulated times every polynomial of degree < WINDOW,
+		and b is consumed WINDOW bits at a time from the top, as in schoolbook multiplication base 2**WINDOW
+	reduction by a sparse modulus x**m + x**k_1 + ... + 1 (the trinomials and pentanomials in
+		numbertheory.primitives and numbertheory.irreducibles) folds everything above degree m back down
+		with a handful of shifts, rather than one subtraction per quotient bit
+	'''
+
+''' WINDOW: bits of b consumed per step of mul '''
+WINDOW = 4
+''' SMALL: below this many bits in b, mul just shifts and xors bit by bit '''
+SMALL = 16
+
+
+
+
+
+
+
+
+
+
+# ARITHMETIC
+
+''' mul: a (int), b (int)
+		returns the carry-less product a*b
+		'''
+def mul(a, b):
+	if a.bit_length() < b.bit_length():		# the shorter factor is the one consumed
+		(a, b) = (b, a)
+	if b.bit_length() < SMALL:
+		r = 0
+		while b:
+			if b & 1:
+				r ^= a
+			a <<= 1
+			b >>= 1
+		return r
+
+	# TABLE OF a TIMES EVERY POLYNOMIAL OF DEGREE < WINDOW
+	table = [0]*(1 << WINDOW)
+	for k in range(1, 1 << WINDOW):
+		if k & 1:
+			table[k] = table[k-1] ^ a
+		else:
+			table[k] = table[k >> 1] << 1
+
+	# CONSUME b FROM THE TOP, WINDOW BITS AT A TIME
+	mask = (1 << WINDOW) - 1
+	r = 0
+	for s in range(((b.bit_length() - 1) // WINDOW) * WINDOW, -1, -WINDOW):
+		r = (r << WINDOW) ^ table[(b >> s) & mask]
+	return r
+
+''' sqr: a (int)
+		returns the carry-less square a*a, which simply spreads the bits of a apart
+		'''
+def sqr(a):
+	r = 0
+	d = 0
+	while a:
+		r |= _spread_[a & 0xff] << d
+		a >>= 8
+		d += 16
+	return r
+_spread_ = [sum(((k >> i) & 1) << (2*i) for i in range(8)) for k in range(256)]
+
+''' divmod: a (int), b (int)
+		returns the quotient and remainder of a divided by b
+		uses long division, one quotient bit at a time
+		'''
+def divmod(a, b):
+	if b == 0:
+		raise ZeroDivisionError("Cannot divide a polynomial by 0.")
+	m = b.bit_length() - 1
+	q = 0
+	d = a.bit_length() - 1
+	while d >= m:
+		q |= 1 << (d-m)
+		a ^= b << (d-m)
+		d = a.bit_length() - 1			# skip straight to the next nonzero bit
+	return (q, a)
+
+''' mod: a (int), b (int)
+		returns the remainder of a divided by b
+		'''
+def mod(a, b):
+	return divmod(a, b)[1]
+
+''' inv: a (int), P (int)
+		returns the inverse of a modulo P
+		uses the extended Euclidean algorithm, keeping s_i with s_i * a = r_i (mod P)
+		'''
+def inv(a, P):
+	(r0, r1) = (P, mod(a, P))
+	(s0, s1) = (0, 1)
+	while r1:
+		(q, r) = divmod(r0, r1)
+		(r0, r1) = (r1, r)
+		(s0, s1) = (s1, s0 ^ mul(q, s1))
+	if r0 != 1:
+		raise ZeroDivisionError("Not invertible: shares a factor with the modulus.")
+	return s0
+
+
+
+# SPARSE MODULI
+
+''' sparse: P (int), [terms] (int)
+		if P = x**m + x**k_1 + ... + 1 has at most terms nonzero coefficients,
+			returns (m, [k_1, ...]) so that reduce can fold by P
+		otherwise returns None
+		'''
+def sparse(P, terms=5):
+	if not P & 1 or bin(P).count('1') > terms:
+		return None
+	m = P.bit_length() - 1
+	return (m, [k for k in range(1, m) if (P >> k) & 1])
+
+''' reduce: a (int), m (int), ks (list of ints)
+		returns a mod x**m + x**k_1 + ... + 1
+			since x**m = x**k_1 + ... + 1 modulo P, the part of a above degree m is folded back onto
+			its low bits, which cuts its excess degree by m - max(k_i) each time
+		'''
+def reduce(a, m, ks):
+	low = (1 << m) - 1
+	while a >> m:
+		h = a >> m
+		a = (a & low) ^ h
+		for k in ks:
+			a ^= h << k
+	return a
+
+''' mulmod: a (int), b (int), P (int), [S] ((m, ks) or None)
+		returns a*b mod P
+			S is sparse(P), which folds instead of dividing, or None to divide
+		'''
+def mulmod(a, b, P, S=None):
+	if S is None:
+		return mod(mul(a, b), P)
+	return reduce(mul(a, b), S[0], S[1])
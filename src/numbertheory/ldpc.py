@@ -0,0 +1,114 @@
+#!/usr/bin/env python
+
+import numpy as np
+import scipy.sparse as sp
+
+import bitmatrix
+
+''' STANDARD:    i identifies row, m the number of rows
+                 j identifies column, n the number of columns
+
+    sparse binary parity-check matrices, with a fixed number w of 1s in every column (or every row),
+        are kept as scipy.sparse CSC (or CSR) matrices, so a syndrome costs O(w*n) rather than O(m*n)
+    erasures are solved by peeling: any row with a single unsolved erasure gives that erasure directly,
+        which is then cleared from every other row it is in, until no row has a single one left
+    whatever is left (the core) is solved by bitmatrix.solve, on the rows and columns of the core only
+    '''
+
+
+''' random: shape (m,n), w (int), [by] (string), [rng] (numpy RandomState)
+        returns a random binary m x n matrix with w 1s in each column (by="column"), as a CSC matrix,
+            or with w 1s in each row (by="row"), as a CSR matrix
+        the positions of the 1s in each column (or row) are uniformly random, and distinct
+        PRE: 0 < w <= m (or n, by row)
+        '''
+def random(shape, w, by="column", rng=None):
+    (m,n) = shape
+    if by == "column":
+        (lines, length, form) = (n, m, sp.csc_matrix)
+    elif by == "row":
+        (lines, length, form) = (m, n, sp.csr_matrix)
+    else:
+        raise ValueError("Unknown weight: "+str(by))
+    if not 0 < w <= length:
+        raise ValueError("Cannot put "+str(w)+" 1s in a line of "+str(length)+".")
+    if rng is None:
+        rng = np.random
+
+    # DRAW w POSITIONS PER LINE, AND REDRAW ANY LINE WHICH REPEATS A POSITION
+    P = np.sort(rng.randint(0, length, (lines, w)), axis=1)
+    bad = np.flatnonzero((np.diff(P, axis=1) == 0).any(axis=1))
+    while len(bad) > 0:
+        P[bad] = np.sort(rng.randint(0, length, (len(bad), w)), axis=1)
+        bad = bad[(np.diff(P[bad], axis=1) == 0).any(axis=1)]
+
+    data = np.ones(lines*w, dtype=np.uint8)
+    return form((data, P.ravel(), np.arange(0, lines*w+1, w)), shape=(m,n))
+
+''' syndrome: H (sparse matrix), x (1d-array of 0s and 1s)
+        returns H*x over GF(2), as a uint8 array
+        '''
+def syndrome(H, x):
+    return (H.dot(np.asarray(x, dtype=np.int64)) % 2).astype(np.uint8)
+
+''' peel: A (sparse matrix), b (1d-array of 0s and 1s)
+        finds the unique solution to A*x=b over GF(2), by peeling and then eliminating the core
+        RETURN the solution as a uint8 array, or None if there is no unique solution
+        '''
+def peel(A, b):
+    A = sp.csr_matrix(A)
+    C = A.tocsc()
+    (m,n) = A.shape
+    if m < n:       # IF COLUMNS OUTNUMBER ROWS, OBVIOUSLY NO UNIQUE SOLUTION
+        return None
+    b = np.array(b, dtype=np.uint8) & 1
+    x = np.zeros(n, dtype=np.uint8)
+    solved = np.zeros(n, dtype=bool)
+    degree = np.diff(A.indptr)      # unsolved variables left in each row
+
+    # STEP ONE: SOLVE EACH ROW WITH A SINGLE UNSOLVED VARIABLE, AND CLEAR IT FROM THE OTHER ROWS
+    ripple = list(np.flatnonzero(degree == 1))
+    while ripple:
+        i = ripple.pop()
+        if degree[i] != 1:      # already cleared by another row
+            continue
+        js = A.indices[A.indptr[i]:A.indptr[i+1]]
+        j = js[~solved[js]][0]
+        x[j] = b[i]
+        solved[j] = True
+        for k in C.indices[C.indptr[j]:C.indptr[j+1]]:
+            b[k] ^= x[j]
+            degree[k] -= 1
+            if degree[k] == 1:
+                ripple.append(k)
+
+    # STEP TWO: ELIMINATE WHAT IS LEFT, ON THE ROWS AND COLUMNS OF THE CORE ONLY
+    core = np.flatnonzero(degree > 0)
+    left = np.flatnonzero(~solved)
+    if len(left) > 0:
+        e = bitmatrix.solve(A[core][:,left].toarray(), b[core])
+        if e is None:
+            return None
+        x[left] = e
+    elif np.any(b[core]):
+        return None
+    if np.any(b[degree == 0]):      # every equation cleared of its variables must hold
+        return None
+    return x
+
+''' decode: H (sparse matrix), s (1d-array), y (1d-array), locs (list of ints)
+        as code.decode, for a sparse binary H: the known bits of y are cleared from s,
+            and H[:,locs]*e = s - H*y0 (with y0 the known bits of y, erasures as 0) is peeled
+        RETURN the reconstructed word, with e in the erased bits,
+            or None if the system does not have a unique solution
+        '''
+def decode(H, s, y, locs):
+    X = np.asarray(y).clip(0)
+    if len(locs) == 0:
+        return X
+    z = np.asarray(s, dtype=np.uint8) ^ syndrome(H, X)
+    e = peel(sp.csc_matrix(H)[:,locs], z)
+    if e is None:
+        return None
+    X[locs] = e
+    return X
@@ -2,41 +2,19 @@
 
 import numpy as np
 
+import bitmatrix
+
 ''' STANDARD:    i identifies row, m the number of rows
                  j identifies column, n the number of columns
                  '''
 
 
-# personal lightweight method designed explicitly for calculating rank of binary matrix
-# 'cause I really want to beat out numpy...
-# (I'm still a magnitude off...)
+''' hasfullrank: M (2D binary array)
+        returns True iff M has full rank over GF(2)
+        uses the bit-packed M4RI elimination in bitmatrix, which handles n in the thousands
+        '''
 def hasfullrank(M):
-    # FIRST, WORK WITH TALL RATHER THAN SHORT
-    (m,n) = M.shape
-    if m < n:
-        M = np.transpose(M)
-    else:
-        M = np.copy(M)
-    r = min(m,n)
-    s = max(m,n)
-    
-    for j in range(r):
-        # FIND THE FIRST ROW FROM I THAT HAS NONZERO ELEMENT IN COLUMN I
-        i = j
-        while i < s and M[i,j]==0:
-            i += 1
-        # IF LOOP WENT ALL THE WAY THROUGH, COLUMN ONLY HAS ZEROS: |M|=0
-        if i == s:
-            return False
-        # IF LOOP DID ANYTHING AT ALL, WE MUST PERMUTE
-        if i > j:
-            M[j,:], M[i,:] = M[i,:].copy(), M[j,:].copy()
-        # ROW I IS NOW READY FOR REDUCTION
-        for i in range(j+1,m):
-            if M[i,j] == 1:
-                for k in range(j,r):
-                    M[i,k] ^= M[j,k]
-    return True
+    return bitmatrix.hasfullrank(M)
 
 
 
@@ -59,6 +37,8 @@ def solve(A, B):
         raise ValueError("A and B have incompatible elements.")
     if A.m < A.n:   # IF COLUMNS OUTNUMBER ROWS, OBVIOUSLY NO SOLUTION
         return None
+    if A.F.order == 2:
+        return bitmatrix.solve(A.M, B.M[:,0])
     
     AUG = Matrix(np.concatenate((A.M, B.M), axis=1), A.F)
     
@@ -79,8 +59,9 @@ def solve(A, B):
     # at this point, the top-left n x n sub-matrix of AUG is diagonal
     # we can easily solve each equation with a simple inverse and multiplication
     x = np.zeros(A.n, dtype=B.M.dtype)
+    norms = AUG.F.inv_many(np.diagonal(AUG.M)[:A.n])
     for i in range(A.n):
-        x[i] = AUG.F[AUG.F.inv(AUG[i,i]) * AUG[i,A.n]]
+        x[i] = AUG.F.mul(norms[i], AUG[i,A.n])
     
     # check for contradictions
     if A.m > A.n and not AUG[A.n, A.n] == AUG.F.zero:
@@ -95,10 +76,13 @@ def solve(A, B):
 class Matrix:
     ''' Matrix: M (1 or 2d-array) F (FiniteField)
             all elements of M must be in F
+            if F is GF(2), M is kept as a uint8 array and arithmetic is vectorized
             '''
     def __init__(self, M, F):
         if np.ndim(M) < 2:
             M = np.reshape(M, (1,len(M)))
+        if F.order == 2:
+            M = np.asarray(M, dtype=np.uint8)
             
         (m, n) = M.shape
         '''
@@ -136,6 +120,8 @@ class Matrix:
         if not isinstance(other, Matrix):
             raise TypeError("Cannot compare matrix to "+str(other))
         if self.F == other.F and self.m == other.m and self.n == other.n:
+            if self.F.order == 2:
+                return np.array_equal(self.M, other.M)
             for i in range(self.m):
                 for j in range(self.n):     # note comparison is in field, not by value
                     if not self.F[self[i,j]] == self.F[other[i,j]]:
@@ -148,11 +134,9 @@ class Matrix:
     # -- UNARY OPERATORS --
     ''' -Matrix is just the matrix with each element additively inversed in F '''
     def __neg__(self):
-        X = np.copy(self.M)     # create new array we will make edits to
-        for i in range(self.m):
-            for j in range(self.n):
-                X[i,j] = self.F.neg(X[i,j])
-        return Matrix(X, self.F)
+        if self.F.order == 2:   # in GF(2), every element is its own negative
+            return Matrix(np.copy(self.M), self.F)
+        return Matrix(self.F.neg_many(self.M), self.F)
     
     # --- BINARY OPERATORS ---
     ''' M1 + M2 adds each element piecewise, if they are compatible '''
@@ -164,11 +148,14 @@ class Matrix:
         if not (self.m == other.m and self.n == other.n):
             raise ValueError("Matrix dimensions do not match. Cannot add.")
         
+        if self.F.order == 2:   # addition in GF(2) is XOR
+            return Matrix(self.M ^ other.M, self.F)
+        
         X = np.copy(self.M)     # create new array we will make edits to
         for i in range(self.m):
             for j in range(self.n):
                 # addition automatically coerces result to standard residue in field
-                X[i,j] = self.F[X[i,j] + other[i,j]]
+                X[i,j] = self.F.add(X[i,j], other[i,j])
         return Matrix(X, self.F) 
     
     ''' M1 - M2 is, naturally, M1 + -M2 '''
@@ -180,10 +167,13 @@ class Matrix:
     def __mul__(self, other):
         # if other is a member of F, it's a scalar: multiply element-wise
         if other in self.F:
+            if self.F.order == 2:
+                return Matrix(self.M * (other & 1), self.F)
             X = np.copy(self.M)
             for i in range(self.m):
                 for j in range(self.n):
-                    X[i,j] = self.F[X[i,j] * other]
+                    X[i,j] = self.F.mul(X[i,j], other)
+            return Matrix(X, self.F)
         
         if not isinstance(other, Matrix):
             raise TypeError("Cannot multiply "+str(other)+" by a Matrix")
@@ -192,12 +182,16 @@ class Matrix:
         if not self.n == other.m:
             raise ValueError("Inner dimensions do not match. Cannot multiply.")
         
+        if self.F.order == 2:   # sums of products can be taken as ints, then reduced at once
+            X = np.dot(self.M.astype(int), other.M.astype(int)) & 1
+            return Matrix(X, self.F)
+        
         X = np.zeros((self.m, other.n), dtype=self.M.dtype) # initialize new array
         for i in range(self.m):
             for j in range(other.n):
                 for k in range(self.n):
                     # multiplication automatically coerces result to standard residue in field
-                    X[i,j] = self.F[self[i,k]*other[k,j] + X[i,j]]
+                    X[i,j] = self.F.add(self.F.mul(self[i,k], other[k,j]), X[i,j])
         return Matrix(X, self.F)
     
     ''' reciprocal multiplication to catch (scalar * matrix) operations '''
@@ -228,6 +222,8 @@ class Matrix:
     ''' rank: returns the rank of the matrix
             '''
     def rank(self):
+        if self.F.order == 2:
+            return bitmatrix.rank(self.M)
         R = Matrix(np.copy(self.M), self.F)
         if R.m < R.n:   # ALGORITHM IS SIMPLER IF MATRIX IS TALL...
             R = R.T()
@@ -263,15 +259,20 @@ class Matrix:
         if self[i,i] == self.F.zero:
             return Matrix(X, self.F)      # this row can't be reduced
         
+        if self.F.order == 2:   # norm and scale are all ones, so just XOR row i into the others
+            rows = np.flatnonzero(X[:,i])
+            X[rows[rows != i],:] ^= X[i,:]
+            return Matrix(X, self.F)
+        
         # STEP ONE: GET THE NORM OF THE ROW TO REDUCE BY
         norm = self.F.inv(X[i,i])
         
         for ii in range(self.m):
             if i != ii: # no reduction needed on the reducing row
                 # STEP TWO: GET THE SCALE OF THE ROW TO REDUCE
-                scale = X[ii,i]
+                scale = self.F.mul(norm, X[ii,i])
                 for j in range(self.n):
-                    X[ii,j] = self.F[ X[ii,j] - (norm*scale*X[i,j]) ]
+                    X[ii,j] = self.F.sub(X[ii,j], self.F.mul(scale, X[i,j]))
         return Matrix(X, self.F)
     
     
@@ -312,7 +313,7 @@ class Matrix:
         # STEP TWO: MULTIPLY ALONG THE DIAGONAL
         D = self.F.one
         for i in range(self.m):
-            D = self.F[R[i,i] * D]
+            D = self.F.mul(R[i,i], D)
         # ACCOUNT FOR PERMUTATIONS
         if swaps & 1:
             D = self.F[-D]
@@ -335,7 +336,7 @@ class Matrix:
         # recursive case: multiply each element of the first row by its cofactor, and add
         D = self.F.zero
         for j in range(self.n):
-            D = self.F[self[0,j]*self.cofactor(0,j) + D]
+            D = self.F.add(self.F.mul(self[0,j], self.cofactor(0,j)), D)
         return D
     
     ''' minor: i (int), j (int)
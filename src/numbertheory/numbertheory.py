@@ -1,6 +1,8 @@
 #!/usr/bin/env python
 
-import math
+import itertools
+import fractions
+import gf2x
 from polynomial import Polynomial
 
 ''' gcf: a, b (both ints)
@@ -18,23 +20,34 @@ def gcf(a,b):
 
 ''' isprime: a (int)
 		returns True iff a divides only a and 1
-		uses brute-force algorithm: O(sqrt a)
+		uses trial division by the primes up to 41, then the Miller-Rabin test to each of them as a base:
+			exact for every a below 3.3*10**24, and beyond that wrong with probability under 4**-13
 		'''
 def isprime(a):
 	if a < 2:		# handle negatives and 1 immediately
 		return False
-	if a == 2:		# handle 2 separately since it's even and would mess up the next check
-		return True
-	if not a & 1:	# bitwise and: basically returns the last bit of a (0 iff even)
-		return False
-	if a < 9:		# everything else up to 9 is prime... this lets us start checking divisibility at 3
+	for p in _bases_:
+		if a % p == 0:
+			return a == p
+	if a < 41*41:	# no prime factor up to its square root
 		return True
 	
-	max = int(math.sqrt(a))
-	for i in range(3,max+1):	# try to divide everything up to sqrt a
-		if a % i == 0:
+	# a - 1 = d * 2**s, with d odd
+	(d, s) = (a-1, 0)
+	while not d & 1:
+		(d, s) = (d >> 1, s+1)
+	for b in _bases_:
+		x = pow(b, d, a)
+		if x == 1 or x == a-1:
+			continue
+		for i in xrange(s-1):
+			x = pow(x, 2, a)
+			if x == a-1:
+				break
+		else:			# b witnesses that a is composite
 			return False
 	return True
+_bases_ = [2,3,5,7,11,13,17,19,23,29,31,37,41]
 
 ''' nextprime: [a] (int)
 		returns the smallest prime number greater than a
@@ -50,23 +63,57 @@ def nextprime(a=1):
 		a += 2
 	return a+2
 
-''' factor: a (int), [_f_] (dict int:int), [_p_] (int)
+''' primefactor: a (int)
 		returns prime factorization of a as a prime:power dictionary
-		uses recursive algorithm: parameters _f_ and _p_ are only meant for recursion
+		divides out the primes below 2**10 first, then splits whatever is left with Pollard's rho:
+			a prime factor r is found in about sqrt(r) steps, so only the second-largest prime factor bounds the time
 		'''
-def primefactor(a, _f_=None, _p_=None):
-	if _f_ is None:		# if this is the first call in the recursion tree, initialize _f_ and _p_
-		_f_ = {}
-		_p_ = 2
-	
-	if isprime(a):		# base case: a is its own prime-factorization
-		_f_[a] = _f_.get(a,0)+1
-		return _f_
-	(q, r) = divmod(a, _p_)
-	if r == 0:
-		_f_[_p_] = _f_.get(_p_,0)+1
-		return primefactor(q, _f_=_f_, _p_=_p_)			# if _p_ worked, reuse it
-	return primefactor(a, _f_=_f_, _p_=nextprime(_p_))	# otherwise, move to the next prime
+def primefactor(a):
+	f = {}
+	for p in _trial_:
+		while a % p == 0:
+			f[p] = f.get(p,0)+1
+			a //= p
+	rest = [a] if a > 1 else []
+	while rest:
+		a = rest.pop()
+		if isprime(a):
+			f[a] = f.get(a,0)+1
+		else:
+			d = _rho(a)
+			rest += [d, a//d]
+	return f
+
+''' _rho: a (int)
+		returns a nontrivial factor of composite a, by Brent's variant of Pollard's rho:
+			y -> y**2 + c (mod a) cycles mod each prime r dividing a within about sqrt(r) steps,
+			and a cycle is caught when gcf(a, the product of the differences x - y) exceeds 1
+		if all of a's factors cycle at once, the next c is tried
+		'''
+def _rho(a):
+	for c in itertools.count(1):
+		(y, r, q, g) = (2, 1, 1, 1)
+		while g == 1:
+			x = y
+			for i in xrange(r):
+				y = (y*y + c) % a
+			k = 0
+			while k < r and g == 1:
+				ys = y
+				for i in xrange(min(128, r-k)):		# one gcd per 128 steps
+					y = (y*y + c) % a
+					q = q * abs(x-y) % a
+				g = fractions.gcd(q, a)
+				k += 128
+			r *= 2
+		if g == a:		# the batch overshot: step back through it one gcd at a time
+			g = 1
+			while g == 1:
+				ys = (ys*ys + c) % a
+				g = fractions.gcd(abs(x-ys), a)
+		if g != a:
+			return g
+_trial_ = [p for p in range(2, 2**10) if isprime(p)]
 
 
 
@@ -86,7 +133,9 @@ def primefactor(a, _f_=None, _p_=None):
 
 ''' isirreducible: p (Polynomial)
 		returns True iff p divides only p and 1
-		uses brute-force algorithm: O(p)
+		uses Rabin's test: O(m) powers of x modulo p, rather than trial division by O(p) polynomials
+			p of degree m over GF(q) is irreducible iff x**(q**m) = x (mod p)
+			and x**(q**(m/r)) - x shares no factor with p, for each prime r dividing m
 		'''
 def isirreducible(p):
 	if not isinstance(p, Polynomial):
@@ -94,20 +143,128 @@ def isirreducible(p):
 	
 	if p[0] == p.F.zero:			# insofar as an x can be factored out, p is not irreducible
 		return False					# (parity-check equivalent)
-	if p.degree == 0:				# insofar as scalars are...scalar, p is irreducible . . . I guess
-		return True						# I HONESTLY HAVE NO IDEA WHAT I'M DOING!!!
+	if p.degree <= 1:				# insofar as scalars are...scalar, p is irreducible . . . I guess
+		return True						# and anything of degree 1 certainly is
 	
-	# START AT X+1:
-	#	dividing 1 is meaningless, and so in fact is dividing anything of degree 0
-	q = Polynomial({0:p.F.one, 1:p.F.one}, p.F)
-	while p.degree > q.degree:	# try to divide everything up to p's degree
-		if p % q == p.F.zero:
+	q = p.F.order
+	m = p.degree
+	x = Polynomial({1:p.F.one}, p.F)
+	
+	# xq[k] is x**(q**k) mod p, each one the q-th power of the last
+	xq = [x]
+	for k in range(m):
+		xq.append(powmod(xq[-1], q, p))
+	if not (xq[m] - x) % p == p.F.zero:
+		return False
+	for r in primefactor(m):
+		if polygcd(p, xq[m//r] - x).degree > 0:
 			return False
-		q = q.next()			# I feel like I ought to be skipping more than I am...
 	return True
-	# TODO: in point of fact, for this and the regular number variant, I need only...
-	#		...divide by irreducibles/primes. There's some hard to analyse recursion...
-	#		...but I think employing the nextirreducible/prime methods would be faster.
+
+''' isprimitive: p (Polynomial)
+		returns True iff p is irreducible, and x generates the multiplicative group modulo p
+			IE x has order q**m - 1, which holds iff x**((q**m - 1)/r) != 1 for each prime r dividing it
+		results are memoized, and the sparse polynomials in primitives are known without testing
+		'''
+def isprimitive(p):
+	if p in _isprimitive_:
+		return _isprimitive_[p]
+	
+	if p.F.order == 2 and p.degree in primitives and p == sparse(p.F, p.degree, primitives[p.degree]):
+		ret = True
+	elif not isirreducible(p):
+		ret = False
+	else:
+		N = p.F.order**p.degree - 1
+		x = Polynomial({1:p.F.one}, p.F)
+		ret = N == 1 or all(not powmod(x, N//r, p) == 1 for r in primefactor(N))
+	
+	_isprimitive_[p] = ret
+	return ret
+_isprimitive_ = {}
+
+''' irreducible: F (FiniteField), m (int)
+		returns a monic irreducible polynomial of degree m over F, for building GF(F.order**m)
+			over GF(2), the sparse polynomials in primitives (or failing that, irreducibles) are used first
+			otherwise, it's the smallest irreducible polynomial greater than x**m + 1
+		results are memoized
+		'''
+def irreducible(F, m):
+	if (F.order, m) in _irreducible_:
+		return _irreducible_[(F.order, m)]
+	
+	if F.order == 2 and m in primitives:
+		p = sparse(F, m, primitives[m])
+	elif F.order == 2 and m in irreducibles:
+		p = sparse(F, m, [irreducibles[m]])
+	else:
+		p = nextirreducible(Polynomial({0:F.one, m:F.one}, F))
+	
+	_irreducible_[(F.order, m)] = p
+	return p
+_irreducible_ = {}
+
+''' sparse: F (FiniteField), m (int), ks (list of ints)
+		returns the polynomial x**m + x**k_1 + ... + 1 over F, for each k_i in ks
+		'''
+def sparse(F, m, ks):
+	V = {0:F.one, m:F.one}
+	for k in ks:
+		V[k] = F.one
+	return Polynomial(V, F)
+
+''' powmod: a (Polynomial), e (int), p (Polynomial)
+		returns a**e mod p
+		uses square-and-multiply: O(log e) multiplications
+			over GF(2), on the packed ints of gf2x, folding by p when it is sparse
+		'''
+def powmod(a, e, p):
+	if a.F.order == 2:
+		P = int(p)
+		S = gf2x.sparse(P)
+		(r, a) = (gf2x.mod(1, P), gf2x.mod(int(a), P))
+		while e > 0:
+			if e & 1:
+				r = gf2x.mulmod(r, a, P, S)
+			e >>= 1
+			if e > 0:
+				a = gf2x.mod(gf2x.sqr(a), P) if S is None else gf2x.reduce(gf2x.sqr(a), S[0], S[1])
+		return Polynomial(r, p.F)
+	r = Polynomial({0:a.F.one}, a.F)
+	a = a % p
+	while e > 0:
+		if e & 1:
+			r = (r * a) % p
+		e >>= 1
+		if e > 0:
+			a = (a * a) % p
+	return r
+
+''' polygcd: a (Polynomial), b (Polynomial)
+		returns a greatest common divisor of a and b (not necessarily monic)
+		uses Euclid's algorithm
+		'''
+def polygcd(a, b):
+	while not b == b.F.zero:
+		(a, b) = (b, a % b)
+	return a
+
+''' polyinverse: a (Polynomial), p (Polynomial)
+		returns the inverse of a modulo p
+		uses the extended Euclidean algorithm, keeping s_i with s_i * a = r_i (mod p)
+			until r_i is a nonzero constant c, and then s_i / c is the inverse
+		'''
+def polyinverse(a, p):
+	F = a.F
+	(r0, r1) = (p, a % p)
+	(s0, s1) = (Polynomial([], F), Polynomial([F.one], F))
+	while not r1 == F.zero:
+		(q, r) = divmod(r0, r1)
+		(r0, r1) = (r1, r)
+		(s0, s1) = (s1, s0 - q*s1)
+	if r0.degree != 0:
+		raise ZeroDivisionError("Not invertible: shares a factor with the modulus.")
+	return s0 * Polynomial([F.inv(r0[0])], F)
 
 ''' nextirreducible: p (Polynomial)
 		returns the smallest irreducible polynomial number greater than p
@@ -3,6 +3,7 @@
 from functools import total_ordering
 import numpy as np
 
+import gf2x
 
 
 
@@ -12,46 +13,76 @@ import numpy as np
 
 
 
-''' Polynomial: implementation for polynomials, or more formally, vectors of field elements '''
+
+''' Polynomial: implementation for polynomials, or more formally, vectors of field elements
+		coefficients are kept in a dense list, lowest power first, with no trailing zeros
+		over GF(2), Polynomial(V, F) gives a BinaryPolynomial instead, which keeps them as the bits of an int
+		'''
 @total_ordering				# I don't know what this means. We might have to import functools to get it to work
-class Polynomial:
+class Polynomial(object):
+	__slots__ = ('F', 'degree', '_c_', '_key_')
+	
+	''' GF(2) polynomials are built as BinaryPolynomials '''
+	def __new__(cls, V, F):
+		if cls is Polynomial and F.order == 2:
+			cls = BinaryPolynomial
+		return object.__new__(cls)
+	
 	''' Polynomial: V (see below), F (FiniteField)]
-			if V is an int, this Polynomial evaluated at F.p equals V
+			if V is an int, this Polynomial evaluated at F.order equals V
 			if V is a list, each element is the corresponding coefficient in the extension vector
 			if V is a dictionary, each value is the coefficient of the corresponding key index
 				in the latter two cases, each element of V must be in F
 			'''
 	def __init__(self, V, F):
-		''' self._V_: dictionary representation of coefficient vector (power:coefficient) '''
-		self._V_ = {}
 		''' self.F: coefficient field '''
 		self.F = F
 		
-		# FILL COEFFICIENT DICTIONARY
-		if type(V) is int:
-			# TODO: implement. Not sure how easy it is to do...
-			
-			pass
+		# FILL COEFFICIENT LIST
+		if type(V) is int or type(V) is long:
+			if V < 0:
+				raise ValueError(str(V)+" is negative, so it does not represent a polynomial")
+			c = []
+			while V > 0:			# the digits of V, base F.order, are the coefficients
+				(V, v) = divmod(V, F.order)
+				c.append(F.decode(v))
 		elif type(V) is list or type(V) is np.ndarray:
 			if any(v not in F for v in V):
 				raise TypeError(str(V)+" contains elements which are not in "+str(self.F))
-			for d in range(len(V)):
-				self._V_[d] = V[d]
+			c = list(V)
 		elif type(V) is dict:
 			if any(V[d] not in F for d in V):
 				raise TypeError(str(V)+" contains elements which are not in "+str(self.F))
+			c = [F.zero]*(max(V)+1 if len(V) > 0 else 0)
 			for d in V:
-				self._V_[d] = V[d]
+				c[d] = V[d]
 		else:
 			raise TypeError("V is not a valid type (must be int, list, or dict)")
 		
-		# CLEAR 0 VALUES FROM COEFFICIENT DICTIONARY
-		for d in list(self._V_):
-			if self._V_[d] == self.F.zero:
-				del self._V_[d]
+		self._set_(c)
 		
-		# SET OTHER ATTRIBUTES
-		self.degree = (max(self._V_) if len(self._V_) > 0 else -1)		# -1 so that len = degree +1 = 0
+	''' _set_: c (list)
+			sets the coefficients to c, clearing any trailing zeros (c may be modified)
+			'''
+	def _set_(self, c):
+		zero = self.F.zero
+		while len(c) > 0 and c[-1] == zero:
+			c.pop()
+		''' self._c_: dense list of coefficients, lowest power first '''
+		self._c_ = c
+		''' self.degree: highest power with a nonzero coefficient '''
+		self.degree = len(c) - 1			# -1 so that len = degree +1 = 0
+		''' self._key_: int(self), computed the first time it's needed '''
+		self._key_ = None
+	
+	''' _make_: c (list)
+			returns a new polynomial over the same field with coefficients c, skipping validation
+			'''
+	def _make_(self, c):
+		p = object.__new__(type(self))
+		p.F = self.F
+		p._set_(c)
+		return p
 	
 	
 	
@@ -69,7 +100,9 @@ class Polynomial:
 			raise TypeError(str(key)+" is not a valid degree.")
 		if key < 0:
 			raise ValueError(str(key)+" is not a valid degree.")
-		return self._V_.get(key, self.F.zero)
+		if key > self.degree:
+			return self.F.zero
+		return self._c_[key]
 	
 	
 	
@@ -84,7 +117,7 @@ class Polynomial:
 			'''
 	def array(self):
 		vector = np.zeros(len(self), dtype=(int if self.F.isintegerfield() else object))
-		for d in self._V_:
+		for d in range(len(self)):
 			vector[d] = self[d]
 		return vector
 	
@@ -95,7 +128,12 @@ class Polynomial:
 		if x not in self.F:
 			raise TypeError(str(x)+" is not an element of "+str(self.F))
 		
-		return sum( self[d] * x**d for d in self._V_ )
+		if self.F.isintegerfield():		# Horner's rule
+			r = 0
+			for d in range(self.degree, -1, -1):
+				r = r*x + self[d]
+			return r
+		return sum( self[d] * x**d for d in range(len(self)) if not self[d] == self.F.zero )
 	
 	''' write: [sym (string)]
 			writes out the polynomial in classic V0 + V1 x + V2 x**2 + ... fashion
@@ -105,8 +143,7 @@ class Polynomial:
 		# a rather elegant solution, but with crude output
 		# ret = " + ".join( str(self.V.get(d,0))+" "+sym+"**"+d for d in range(len(self))[::-1] )
 		
-		ds = list(self._V_)
-		ds.sort()
+		ds = [d for d in range(len(self)) if not self[d] == self.F.zero]
 		
 		if len(ds) == 0:		# if polynomial has no coefficients, it's simply 0
 			return "0"
@@ -130,17 +167,19 @@ class Polynomial:
 	
 	''' next: returns the next highest polynomial with coefficients in F '''
 	def next(self):
-		V = self._V_.copy()
+		c = list(self._c_)
 		
 		d = 0
 		while True:		# stop condition is when we get incrementing a coefficient gives a non-zero
+			if d == len(c):
+				c.append(self.F.zero)
 			if self.F.isintegerfield():
-				V[d] = self.F[ V.get(d, 0) + 1 ]
+				c[d] = self.F[ c[d] + 1 ]
 			else:
-				V[d] = V.get(d, self.F.zero).next()
+				c[d] = c[d].next()
 		
-			if not V[d] == self.F.zero:
-				return Polynomial(V, self.F)
+			if not c[d] == self.F.zero:
+				return self._make_(c)
 			d += 1
 		# we're guaranteed to return something eventually
 	
@@ -168,17 +207,24 @@ class Polynomial:
 	
 	
 	''' int(Polynomial) gives the "order" i, where this polynomial is the i-th largest polynomial in F above 0
-			this is, very conveniently, simply solving the polynomial at F.P
+			this is, very conveniently, the number whose base-F.order digits are the (int) coefficients
+			it is computed once, then kept as the key for hashing, equality and ordering
 			'''
 	def __int__(self):
-		return int(self.solve(self.F.P))			# if field is GF(p^m), solve(F.P) is a polynomial and we need recursion
+		if self._key_ is None:
+			q = self.F.order
+			k = 0
+			for v in reversed(self._c_):	# if field is GF(p^m), int(v) recurses into the coefficient
+				k = k*q + int(v)
+			self._key_ = k
+		return self._key_
 	
 	''' hash(Polynomial) is the same as int '''
 	def __hash__(self):
 		return int(self)
 	
 	
-	''' p1 == p2 iff p1 and p2 have identical coefficients
+	''' p1 == p2 iff p1 and p2 have identical coefficients, IE the same int
 			for convenience, comparisons to 0 and 1 are allowed
 			all other incompatible arguments, including polynomials with different coefficient fields, return false
 			'''
@@ -191,7 +237,11 @@ class Polynomial:
 			return False
 		if not self.F == other.F:
 			return False
-		return self._V_ == other._V_
+		return int(self) == int(other)
+	
+	''' p1 != p2 iff not p1 == p2 '''
+	def __ne__(self, other):
+		return not self == other
 	
 	''' p1 > p2 iff int(p1) > int(p2)
 			if the coefficient fields don't match, these polynomials are incomparable and a ValueError is raised
@@ -215,10 +265,7 @@ class Polynomial:
 	
 	''' -p1 has additive inverse of each coefficient of p1 '''
 	def __neg__(self):
-		V = {}
-		for d in self._V_:
-			V[d] = self.F.neg( self[d] )
-		return Polynomial(V, self.F)
+		return self._make_([self.F.neg(v) for v in self._c_])
 	
 	#	-- NORMAL OPERATORS --
 	
@@ -233,10 +280,11 @@ class Polynomial:
 		if not self.F == other.F:
 			raise ValueError("Polynomial arguments have different coefficient fields. Cannot add.")
 		
-		V = {}
-		for d in list(set(self._V_)|set(other._V_)):
-			V[d] = self.F[ self[d]+other[d] ]
-		return Polynomial(V, self.F)
+		(a, b) = (self._c_, other._c_) if len(self) >= len(other) else (other._c_, self._c_)
+		c = list(a)
+		for d in range(len(b)):
+			c[d] = self.F.add(c[d], b[d])
+		return self._make_(c)
 	
 	''' p1 - p2 is, naturally, p1 + -p2 '''
 	def __sub__(self, other):
@@ -251,30 +299,44 @@ class Polynomial:
 	def __mul__(self, other):
 		if not isinstance(other, Polynomial):
 			if other == 0:
-				return Polynomial({0:self.F.zero}, self.F)
+				return self._make_([])
 			if other == 1:
 				return self
 			raise TypeError("Cannot multiply "+str(other)+" with a Polynomial")
 		if not self.F == other.F:
 			raise ValueError("Polynomial arguments have different coefficient fields. Cannot multiply.")
+		if len(self) == 0 or len(other) == 0:
+			return self._make_([])
 		
-		V = {}
-		for d1 in self._V_:
-			for d2 in other._V_:
-				V[d1+d2] = self.F[ V.get(d1+d2, self.F.zero) + self[d1]*other[d2] ]
+		if self.F.isintegerfield():		# sum the products as plain ints, and reduce just once at the end
+			c = [0]*(len(self)+len(other)-1)
+			for (d1, v1) in enumerate(self._c_):
+				if v1:
+					for (d2, v2) in enumerate(other._c_):
+						c[d1+d2] += v1*v2
+			return self._make_([v % self.F.p for v in c])
 		
-		return Polynomial(V, self.F)
+		c = [self.F.zero]*(len(self)+len(other)-1)
+		for (d1, v1) in enumerate(self._c_):
+			for (d2, v2) in enumerate(other._c_):
+				c[d1+d2] = self.F.add(c[d1+d2], self.F.mul(v1, v2))
+		return self._make_(c)
 	
-	''' p1 ** n is repeated multiplication of p1 with itself '''
+	''' p1 ** n is repeated multiplication of p1 with itself, by square-and-multiply '''
 	def __pow__(self, other):
 		if type(other) is not int:
 			raise TypeError("Polynomials can only be raised to integer powers.")
 		if other < 0:
 			raise ValueError("Negative exponents of polynomials are not supported. Use FiniteField.inv() instead.")
 		
-		p = self.F.one
-		for i in range(other):
-			p = p * self
+		p = self._make_([self.F.one])
+		a = self
+		while other > 0:
+			if other & 1:
+				p = p * a
+			other >>= 1
+			if other > 0:
+				a = a * a
 		return p
 	
 	''' divmod(p1, p2) does long division of p1 and p2
@@ -283,28 +345,28 @@ class Polynomial:
 	def __divmod__(self, other):
 		if not isinstance(other, Polynomial):
 			if other == 1:
-				return self
+				return (self, self._make_([]))
 			raise TypeError(str(other)+" cannot divide a Polynomial")
 		if not self.F == other.F:
 			raise ValueError("Polynomial arguments have different coefficient fields. Cannot divide.")
+		if len(other) == 0:
+			raise ZeroDivisionError("Cannot divide a Polynomial by 0.")
 		
-		q = {}								# coefficients for the quotient
-		r = Polynomial(self._V_, self.F)	# polynomial for remainder
+		F = self.F
+		r = list(self._c_)						# coefficients for the remainder
+		q = [F.zero]*max(len(r)-other.degree, 0)	# coefficients for the quotient
+		norm = F.inv(other[other.degree])
 		
-		while r.degree >= other.degree:			# TODO: this may be tricksier in F.p > 2
-			# c * x**d   is the leading term of the quotient not yet calculated
-			c = self.F[ r[r.degree] * self.F.inv(other[other.degree]) ]
-			d = r.degree - other.degree
-			
-			q[d] = c							# add this term to the quotient
+		for d in range(len(r)-len(other), -1, -1):
+			# c * x**d   is the next term of the quotient
+			c = F.mul(r[d+other.degree], norm)
+			if c == F.zero:
+				continue
+			q[d] = c
+			for (i, v) in enumerate(other._c_):	# subtract c * x**d * other from the remainder
+				r[d+i] = F.sub(r[d+i], F.mul(c, v))
 			
-			p = {}
-			for i in other._V_:					# craft the total contribution from q[d]
-				p[i+d] = other[i]
-			
-			r = r - Polynomial(p, self.F)		# update remainder after this iteration
-		
-		return (Polynomial(q, self.F), r)
+		return (self._make_(q), self._make_(r[:other.degree]))
 	
 	''' p1 // p2 is the quotient portion of divmod(p1,p2) '''
 	def __floordiv__(self, other):
@@ -317,3 +379,150 @@ class Polynomial:
 		return r
 
 
+
+
+
+
+
+
+
+
+''' BinaryPolynomial: Polynomial over GF(2), with its coefficients kept as the bits of an int
+		bit d of self._b_ is the coefficient of x**d, so self._b_ is also int(self)
+		'''
+class BinaryPolynomial(Polynomial):
+	__slots__ = ('_b_',)
+	
+	''' BinaryPolynomial: V, F (FiniteField)
+			as for Polynomial, but F must be GF(2)
+			'''
+	def __init__(self, V, F):
+		self.F = F
+		if type(V) is int or type(V) is long:
+			if V < 0:
+				raise ValueError(str(V)+" is negative, so it does not represent a polynomial")
+			self._setb_(V)
+			return
+		Polynomial.__init__(self, V, F)
+	
+	''' _set_: c (list)
+			sets the coefficients to the bits c
+			'''
+	def _set_(self, c):
+		b = 0
+		for d in range(len(c)):
+			if c[d]:
+				b |= 1 << d
+		self._setb_(b)
+	
+	''' _setb_: b (int)
+			sets the coefficients to the bits of b
+			'''
+	def _setb_(self, b):
+		''' self._b_: int whose bit d is the coefficient of x**d '''
+		self._b_ = b
+		self.degree = b.bit_length() - 1
+	
+	''' _makeb_: b (int)
+			returns a new polynomial over GF(2) with coefficients the bits of b
+			'''
+	def _makeb_(self, b):
+		p = object.__new__(BinaryPolynomial)
+		p.F = self.F
+		p._setb_(b)
+		return p
+	
+	
+	# MAGIC CONTAINER METHODS
+	
+	''' Polynomial[key] returns the coefficient for power key '''
+	def __getitem__(self, key):
+		if type(key) is not int:
+			raise TypeError(str(key)+" is not a valid degree.")
+		if key < 0:
+			raise ValueError(str(key)+" is not a valid degree.")
+		return (self._b_ >> key) & 1
+	
+	
+	# SPECIAL METHODS
+	
+	''' array: no parameters
+			returns a list of coefficients, where the index refers to the degree
+			'''
+	def array(self):
+		return np.array([(self._b_ >> d) & 1 for d in range(len(self))], dtype=int)
+	
+	''' next: returns the next highest polynomial with coefficients in F
+			which, as bits, is just one more
+			'''
+	def next(self):
+		return self._makeb_(self._b_ + 1)
+	
+	
+	# MISCELLANEOUS MAGIC METHODS
+	
+	''' int(Polynomial) is the int of coefficient bits '''
+	def __int__(self):
+		return self._b_
+	
+	''' hash(Polynomial) is the same as int '''
+	def __hash__(self):
+		return self._b_
+	
+	''' p1 == p2 iff p1 and p2 have identical coefficients, as for Polynomial '''
+	def __eq__(self, other):
+		if not isinstance(other, Polynomial):
+			if other == 0:
+				return self._b_ == 0
+			if other == 1:
+				return self._b_ == 1
+			return False
+		if not self.F == other.F:
+			return False
+		return self._b_ == int(other)
+	
+	
+	# POLYNOMIAL ARITHMETIC
+	
+	''' -p1 is p1, since every element of GF(2) is its own additive inverse '''
+	def __neg__(self):
+		return self
+	
+	''' p1 + p2 is bitwise xor '''
+	def __add__(self, other):
+		if not isinstance(other, Polynomial):
+			if other == 0:
+				return self
+			raise TypeError("Cannot add "+str(other)+" to a Polynomial")
+		if not self.F == other.F:
+			raise ValueError("Polynomial arguments have different coefficient fields. Cannot add.")
+		return self._makeb_(self._b_ ^ other._b_)
+	
+	''' p1 - p2 is the same as p1 + p2 '''
+	def __sub__(self, other):
+		if not isinstance(other, Polynomial):
+			raise TypeError("Cannot subtract "+str(other)+" from a Polynomial")
+		return self + other
+	
+	''' p1 * p2 is carry-less multiplication (see gf2x.mul) '''
+	def __mul__(self, other):
+		if not isinstance(other, Polynomial):
+			if other == 0:
+				return self._makeb_(0)
+			if other == 1:
+				return self
+			raise TypeError("Cannot multiply "+str(other)+" with a Polynomial")
+		if not self.F == other.F:
+			raise ValueError("Polynomial arguments have different coefficient fields. Cannot multiply.")
+		return self._makeb_(gf2x.mul(self._b_, other._b_))
+	
+	''' divmod(p1, p2) does long division of p1 and p2, one bit at a time (see gf2x.divmod) '''
+	def __divmod__(self, other):
+		if not isinstance(other, Polynomial):
+			if other == 1:
+				return (self, self._makeb_(0))
+			raise TypeError(str(other)+" cannot divide a Polynomial")
+		if not self.F == other.F:
+			raise ValueError("Polynomial arguments have different coefficient fields. Cannot divide.")
+		(q, r) = gf2x.divmod(self._b_, other._b_)
+		return (self._makeb_(q), self._makeb_(r))
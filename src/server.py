@@ -8,9 +8,9 @@ from flask import Flask, render_template, request, jsonify
 import communication.word as word
 import communication.channel as channel
 
-from numbertheory.field import FiniteField as GF
-from numbertheory.code import RS
-from numbertheory.linalg import Matrix, solve
+from numbertheory.code import syndrome, decode, syndrome_RS, decode_RS
+import numbertheory.cache as cache
+from numbertheory.linalg import Matrix
 
 from theory.multivariate import D as excess
 
@@ -48,26 +48,22 @@ def erasure_rs_simulate():
     q = 2**m
     
     
-    # SETUP SCENARIO
-    Z2 = GF(2)
-    x = word.polynomials(word.random(m*n), Z2, m)
-    y = channel.erasure(x, t=t)
+    # SETUP SCENARIO (fields are cached, since requests tend to repeat m)
+    x = word.symbols(word.random(m*n), m)                      # ints, encoding elements of GF(q)
+    (y, erased) = channel.erasures(x, t=t)
     
     if t > 0:
-        F = GF(q)
-        H = RS(F, (t,n))
+        F = cache.field(q)
     
-        # PERFORM COMMUNICATION
-        s = H * Matrix(x,F).T()
-        s_disp = s.T().M[0]
+        # PERFORM COMMUNICATION (the RS syndrome is just x evaluated at alpha**1 ... alpha**t)
+        s = syndrome_RS(F, x, t)
+        s_disp = s
     
         # BOB SOLVES FOR X USING Y AND S
-        X = np.array([F.zero if i is None else i for i in y])   # pretend erasures are 0
-        z = s - H * Matrix(X,F).T()                             # get right-hand side of equation
-        locs = np.where([i==None for i in y])[0]                # find error locations
-        h = H[:,locs]                                           # get left-hand side of equation
-        e = solve(h, z)                                         # solve for our error
-        X[locs] = e                                             # add in our error
+        locs = np.flatnonzero(erased)                           # find error locations
+        X = decode_RS(F, s, y, locs)                            # solve for the erased symbols
+        if X is None:                                           # too many erasures to solve: Bob keeps y
+            X = y
     else:
         s_disp = ""
         X = y
@@ -114,31 +110,26 @@ def erasure_rn_simulate():
         random.seed(input['seed'])
     
     # SETUP SCENARIO
-    Z2 = GF(2)
+    Z2 = cache.field(2)
     R = word.NUMPY(n, word.random(n))
     c = t + d
     
     x = word.random(n)
-    y = channel.erasure(x, t=t)
+    (y, erased) = channel.erasures(x, t=t)
     
     if t > 0:
         H = np.array([R.next() for i in range(c)])
         H = Matrix(H, Z2)
     
         # PERFORM COMMUNICATION
-        s = H * Matrix(x,Z2).T()
-        s_disp = s.T().M[0]
+        s = syndrome(H, x)
+        s_disp = s
     
         # BOB SOLVES FOR X USING Y AND S
-        X = np.array([0 if i < 0 else i for i in y])            # pretend erasures are 0
-        S = s - H * Matrix(X,Z2).T()                            # get right-hand side of equation
-        locs = np.where([i<0 for i in y])[0]                    # find error locations
-        h = H[:,locs]                                           # get left-hand side of equation
-        e = solve(h, S)                                         # solve for our error
-        if e is None:
+        locs = np.flatnonzero(erased)                           # find error locations
+        X = decode(H, s, y, locs)                               # solve for the erased bits
+        if X is None:
             X = y
-        else:
-            X[locs] = e                                         # add in our error
     else:
         s_disp = ""
         X = y
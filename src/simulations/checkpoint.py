@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+
+import os
+import os.path
+import csv
+import json
+import time
+
+''' Purpose:    let long simulation sweeps pick up where they left off
+                '''
+''' Design:     a sweep writes finished rows to its .dat file, as always,
+                    so the .dat file itself says which cells are already complete
+                work on cells not yet complete is recorded in a sidecar .ckpt file (JSON),
+                    which is rewritten atomically at most every few seconds,
+                    so a killed sweep loses at most those few seconds of work
+                '''
+
+
+''' read: name (string)
+        returns the rows of the .dat file called name, as a list of dicts (header:value)
+            or an empty list, if the file does not exist
+        '''
+def read(name):
+    if not os.path.isfile(name):
+        return []
+    with open(name) as dat:
+        return list(csv.DictReader(dat))
+
+''' progress: rows (list of dicts)
+        for rows of a multivariate .dat file (see simulations.multivariate.start),
+        returns a dictionary mapping each (n,t) seen to (c, perfects):
+            c is the next c to run, and perfects the number of perfect c's in a row before it
+            so (n,t) is complete iff perfects is at least 3
+        '''
+def progress(rows):
+    eps = {}
+    for row in rows:        # a repeated (n,t,c) keeps its last row
+        eps[(int(row['N']), int(row['T']), int(row['C']))] = float(row['EPS'])
+
+    ret = {}
+    for (n,t,c) in sorted(eps):
+        (cp, perfects) = ret.get((n,t), (t, 0))
+        if c != cp:         # only rows continuing the run from t count
+            continue
+        ret[(n,t)] = (c+1, perfects+1 if eps[(n,t,c)] == 0 else 0)
+    return ret
+
+''' finished: rows (list of dicts)
+        for rows of a reconciliation .dat file (see simulations.reconciliation.start),
+        returns the set of (n,t) which already have a row
+        '''
+def finished(rows):
+    return set((int(row['N']), int(row['T'])) for row in rows)
+
+
+
+''' Checkpoint: partial work for one .dat file, saved in a sidecar .ckpt file '''
+class Checkpoint:
+    ''' Checkpoint: name (string), [interval] (float)
+            name is the .dat file the sweep writes to
+            interval is the most seconds of work that may go unsaved
+            '''
+    def __init__(self, name, interval=5.0):
+        ''' self.dat: the .dat file the sweep writes to '''
+        self.dat = name
+        ''' self.name: the sidecar file '''
+        self.name = name + ".ckpt"
+        ''' self.interval: seconds between saves '''
+        self.interval = interval
+        ''' self.saved: time of the last save '''
+        self.saved = time.time()
+        ''' self._work_: partial work, keyed by string '''
+        self._work_ = {}
+        if os.path.isfile(self.name):
+            with open(self.name) as ckpt:
+                self._work_ = json.load(ckpt)
+
+    ''' rows: returns the rows currently in the .dat file '''
+    def rows(self):
+        return read(self.dat)
+
+    ''' key: args (anything)
+            returns the string key for the given cell or unit identifiers
+            '''
+    @staticmethod
+    def key(*args):
+        return ','.join(str(a) for a in args)
+
+    ''' keys: returns the keys of all saved partial work '''
+    def keys(self):
+        return list(self._work_)
+
+    ''' get: key (string), [default]
+            returns the partial work saved under key, or default if there is none
+            '''
+    def get(self, key, default=None):
+        return self._work_.get(key, default)
+
+    ''' set: key (string), value (JSON-able)
+            saves value as the partial work under key
+            '''
+    def set(self, key, value):
+        self._work_[key] = value
+        if time.time() - self.saved >= self.interval:
+            self.save()
+
+    ''' pop: keys (strings)
+            forgets the partial work under each key, once its row has been written
+            '''
+    def pop(self, *keys):
+        for key in keys:
+            self._work_.pop(key, None)
+        if time.time() - self.saved >= self.interval:
+            self.save()
+
+    ''' save: writes all partial work to the sidecar file, replacing it atomically '''
+    def save(self):
+        tmp = self.name + ".tmp"
+        with open(tmp, "w") as ckpt:
+            json.dump(self._work_, ckpt)
+        os.rename(tmp, self.name)
+        self.saved = time.time()
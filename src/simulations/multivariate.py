@@ -5,6 +5,8 @@ import random
 import numpy as np
 import communication.word as word
 from numbertheory.linalg import hasfullrank
+from numbertheory.bitmatrix import ranks
+import numbertheory.ldpc as ldpc
 from theory.multivariate import ratioofn, logofn
 
 ''' Purpose:    empirically determine how likely a random selection of points for n variables
@@ -26,50 +28,148 @@ from theory.multivariate import ratioofn, logofn
                     N(umber of trials)
                     n (width of matrix)       * experiment will test all t in [1,n]
                     RNG (random bit generator)  * must have (n,seed) constructor and next() method
+                    [w] (column or row weight)  * if given, W is instead a sparse random matrix
+                                                  with w 1s per column (or row), see numbertheory.ldpc
                 
                 Output (for each (n,t,c)):  n, t, c, eps, N
                 
                 '''
 
 
-''' simulate: n (int), t (int), c (int), R (random bit stream)
+''' simulate: n (int), t (int), c (int), R (random bit stream), [w] (int), [by] (string)
         generates W, a random n x c matrix, from R
+            or, if w is given, a sparse one with w 1s in each column or row (see sparse)
         then selects t random columns to form Wp
         RETURN: W iff it does not have rank t
         PRE: 0 < t <= c
         '''
-def simulate(n, t, c, R):
-    W = np.array([R.next() for i in range(c)])
+def simulate(n, t, c, R, w=None, by="column"):
+    W = word.rows(R, c) if w is None else sparse(n, c, w, by).toarray()
     Wp = W[:,random.sample(range(n),t)]
     if not hasfullrank(Wp):
         return Wp
 
 
-''' experiment: N (int), n (int), RNG (random bit generator), out (file), [fail (file)]
+''' sparse: n (int), c (int), w (int), by (string)
+        returns a sparse random c x n matrix W with w 1s in each column (by="column") or row (by="row"),
+            as ldpc.random, except that a column of only c < w entries (as when c starts at t) is all 1s
+        '''
+def sparse(n, c, w, by):
+    return ldpc.random((c,n), min(w, c if by == "column" else n), by)
+
+
+''' simulate_batch: N (int), n (int), t (int), c (int), RNG (random bit generator), [fails] (bool),
+                    [w] (int), [by] (string)
+        runs simulate N times, each with a freshly seeded R from RNG (or a sparse W, if w is given),
+            but stacks the N matrices Wp into one N x c x t tensor
+            and computes all of their ranks in a single vectorized pass
+        RETURN the number of Wp which do not have rank t,
+            along with the list of those Wp, if fails is True
+        PRE: 0 < t <= c
+        '''
+def simulate_batch(N, n, t, c, RNG, fails=False, w=None, by="column"):
+    Wp = np.empty((N,c,t), dtype=np.uint8)
+    for i in range(N):
+        if w is None:
+            W = word.rows(RNG(n, _seed(n)), c)
+        else:       # a sparse W is only made dense once its t columns are picked
+            W = sparse(n, c, w, by).tocsc()
+        cols = random.sample(range(n),t)
+        Wp[i] = W[:,cols] if w is None else W[:,cols].toarray()
+    
+    failed = ranks(Wp) < t
+    if fails:
+        return np.count_nonzero(failed), list(Wp[failed])
+    return np.count_nonzero(failed)
+
+''' first_full: n (int), t (int), R (random bit stream), [cmax] (int)
+        takes the rows of W one at a time, keeping the same t random columns of each,
+            and reduces each new row against the echelon basis kept from the rows before it
+            (rows are Python ints, so one reduction is at most t XORs)
+        rows are drawn from R t at a time (see word.rows), since rank t needs at least t of them
+        RETURN the smallest c for which the first c rows have rank t,
+            or None if that doesn't happen within cmax rows
+        '''
+def first_full(n, t, R, cmax=None):
+    cols = random.sample(range(n),t)
+    basis = {}      # leading bit -> basis row with that leading bit
+    c = 0
+    while cmax is None or c < cmax:
+        for bits in np.asarray(word.rows(R, t))[:,cols]:
+            row = int(''.join(str(b) for b in bits), 2)
+            c += 1
+            while row:
+                lead = row.bit_length() - 1
+                if lead not in basis:
+                    basis[lead] = row
+                    break
+                row ^= basis[lead]
+            if len(basis) == t:
+                return c
+            if c == cmax:
+                return None
+    return None
+
+''' simulate_incremental: N (int), n (int), t (int), RNG (random bit generator), out (file)
+        runs N trials of first_full, each with a freshly seeded R from RNG,
+            so a trial's W for c+1 is its W for c with one more row
+        then prints n, t, c, eps, and N for each c, until 3 in a row are perfect,
+            where eps is the fraction of trials which first reached rank t after c rows
+        RETURN the c after the last one printed
+        '''
+def simulate_incremental(N, n, t, RNG, out):
+    firsts = np.array([first_full(n, t, RNG(n, _seed(n))) for i in range(N)])
+    c = t
+    perfects = 0
+    while perfects < 3:
+        eps = (1.0*np.count_nonzero(firsts > c))/N
+        out.write(','.join([str(n), str(t), str(c), str(eps), str(N)])+"\n")
+        # CONTROL LOOP
+        if eps == 0:
+            perfects +=1
+        else:
+            perfects = 0
+        c += 1
+    return c
+
+''' _seed: n (int)
+        returns a random binary n-vector seed, which is guaranteed to have at least one 1
+        '''
+def _seed(n):
+    seed = np.array([random.randint(0,1) for j in range(n)], dtype=int)
+    seed[random.choice(range(n))] |= 1    # guarantee seed has at least one 1 
+    return seed
+
+
+''' experiment: N (int), n (int), RNG (random bit generator), out (file), [fail (file)],
+                [incremental (bool)], [w] (int), [by] (string)
         runs N experiments for all t in [1,n], c in [t,n]
         prints t, c, eps, and N for each (t,c) to out
         prints W to fail, if fail is given
+        if incremental is True, each trial is carried from c to c+1 (see simulate_incremental)
+            instead of drawing N new trials for every c, and nothing is printed to fail
+        if w is given, each W is a sparse random matrix with w 1s per column or row (see simulate)
+            and its rows can't be drawn one at a time, so incremental must be False
         '''
-def experiment(N, n, RNG, out, fail=None):
+def experiment(N, n, RNG, out, fail=None, incremental=False, w=None, by="column"):
+    if incremental and w is not None:
+        raise ValueError("A sparse W can't be carried from c to c+1.")
     for t in range(1,n+1):
+        if incremental:
+            c = simulate_incremental(N, n, t, RNG, out)
+            print "----- Finished t =",t,"experiments at c =",c,"------"
+            continue
         c = t
         
         # keep increasing c until 3 in a row are perfect
         perfects = 0
         while perfects < 3:
-            eps = 0
-            for i in range(N):
-                # INITIALIZE RANDOM STREAM
-                seed = np.array([random.randint(0,1) for j in range(n)], dtype=int)
-                seed[random.choice(range(n))] |= 1    # guarantee seed has at least one 1 
-                R = RNG(n, seed)
-                # PROCESS SIMULATION
-                W = simulate(n,t,c,R)   # None if experiment succeeded
-                if W is not None:
-                    eps += 1
-                    if fail is not None:
-                        fail.write("-----------------------------------------\n")
-                        fail.write(str(W))
+            # PROCESS ALL N SIMULATIONS AT ONCE
+            eps, Ws = simulate_batch(N, n, t, c, RNG, fails=True, w=w, by=by)
+            if fail is not None:
+                for W in Ws:
+                    fail.write("-----------------------------------------\n")
+                    fail.write(str(W))
             eps = (1.0*eps)/N
             out.write(','.join([str(n), str(t), str(c), str(eps), str(N)])+"\n")
             # CONTROL LOOP
@@ -81,31 +181,35 @@ def experiment(N, n, RNG, out, fail=None):
         print "----- Finished t =",t,"experiments at c =",c,"------"
 
 ''' experiment_t: N (int), n (int), t_fun (int array->int array function),
-                    RNG (random bit generator), out (file), [fail (file)]
+                    RNG (random bit generator), out (file), [fail (file)], [incremental (bool)],
+                    [w] (int), [by] (string)
         runs N experiments for t=tfun(n), c in [t,n]
         prints t, c, eps, and N for each (t,c) to out
         prints W to fail, if fail is given
+        if incremental is True, each trial is carried from c to c+1 (see simulate_incremental)
+            instead of drawing N new trials for every c, and nothing is printed to fail
+        if w is given, each W is a sparse random matrix with w 1s per column or row (see simulate)
+            and its rows can't be drawn one at a time, so incremental must be False
         '''
-def experiment_t(N, n, t_fun, RNG, out, fail=None):
+def experiment_t(N, n, t_fun, RNG, out, fail=None, incremental=False, w=None, by="column"):
+    if incremental and w is not None:
+        raise ValueError("A sparse W can't be carried from c to c+1.")
     t = t_fun(n)
+    if incremental:
+        c = simulate_incremental(N, n, t, RNG, out)
+        print "----- Finished t =",t,"experiments at c =",c,"------"
+        return
     c = t
     
     # keep increasing c until 3 in a row are perfect
     perfects = 0
     while perfects < 3:
-        eps = 0
-        for i in range(N):
-            # INITIALIZE RANDOM STREAM
-            seed = np.array([random.randint(0,1) for j in range(n)], dtype=int)
-            seed[random.choice(range(n))] |= 1    # guarantee seed has at least one 1 
-            R = RNG(n, seed)
-            # PROCESS SIMULATION
-            W = simulate(n,t,c,R)   # None if experiment succeeded
-            if W is not None:
-                eps += 1
-                if fail is not None:
-                    fail.write("-----------------------------------------\n")
-                    fail.write(str(W))
+        # PROCESS ALL N SIMULATIONS AT ONCE
+        eps, Ws = simulate_batch(N, n, t, c, RNG, fails=True, w=w, by=by)
+        if fail is not None:
+            for W in Ws:
+                fail.write("-----------------------------------------\n")
+                fail.write(str(W))
         eps = (1.0*eps)/N
         out.write(','.join([str(n), str(t), str(c), str(eps), str(N)])+"\n")
         # CONTROL LOOP
@@ -153,6 +257,20 @@ for n in ns:
     experiment(N, n, word.NUMPY, NUMPY, None)
 """
 
+##################################################
+#                 SPARSE W
+##################################################
+"""
+LDPC = start("LDPC3", path, ext)
+
+N = 1000
+ns = [127]
+
+for n in ns:
+    print "--- Starting sparse (w = 3) experiment for n =",n,"---"
+    experiment(N, n, word.NUMPY, LDPC, None, w=3)
+"""
+
 ##################################################
 #                 TARGETING t(n)
 ##################################################
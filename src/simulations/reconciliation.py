@@ -6,12 +6,16 @@ import communication.word as word
 import communication.channel as channel
 
 from numbertheory.field import FiniteField as GF
-from numbertheory.code import RS
-from numbertheory.linalg import Matrix, solve
+from numbertheory.code import syndrome, decode, syndrome_RS, decode_RS
+import numbertheory.cache as cache
+from numbertheory.linalg import Matrix
+import numbertheory.ldpc as ldpc
 
 from theory.multivariate import D as excess
 from theory.multivariate import ratioofn, logofn
 
+from simulations.checkpoint import Checkpoint, finished
+
 ''' Purpose:    compare run-time efficiency between implemented reconciliation protocols
                 '''
 ''' Process:    1) generate a random x
@@ -29,73 +33,61 @@ from theory.multivariate import ratioofn, logofn
 Z2 = GF(2)      # binary finite field for polynomial coefficients
 
 ''' nonbinary protocol, adapted to binary '''
-def simulate_RS(x0, y0, m, H, F):
-    # ZEROTH pad x0 with zeros so its length is divisible by m
-    xp = x0
-    if len(x0) % m != 0:
-        xp = np.pad(x0, (0,m-len(x0)%m), 'constant')
-    
-    # FIRST convert x and y into polynomial arrays
-    x = word.polynomials(xp, Z2, m)
-    y = np.copy(x)
-    for i in range(len(x0)):     # erase each polynomial containing an erasure
-        if y0[i] < 0:
-            y[i/m] = None
+def simulate_RS(x0, y0, m, t, F):
+    # FIRST convert x and y into m-bit symbols (ints, encoding elements of F)
+    x = word.symbols(x0, m)
+    y = word.symbols(y0, m)                                 # each symbol containing an erasure is -1
+    locs = np.flatnonzero(y < 0)
     
     # SECOND solve the erasures
-    s = H * Matrix(x,F).T()                                 # calculate redundancy
-    X = np.array([F.zero if i is None else i for i in y])   # pretend erasures are 0
-    z = s - H * Matrix(X,F).T()                             # get right-hand side of equation
-    locs = np.where([i==None for i in y])[0]                # find error locations
-    h = H[:,locs]                                           # get left-hand side of equation
-    e = solve(h, z)                                         # solve for our error
-    X[locs] = e                                             # add in our error
+    s = syndrome_RS(F, x, t)                                # calculate redundancy
+    X = decode_RS(F, s, y, locs)                            # solve for the erased symbols
+    if X is None:
+        return y0
     
     # THIRD convert result into bits
-    X0 = np.zeros(len(xp), dtype=int)
-    for i in range(len(X)):
-        sec = X[i].array()
-        sec = np.pad(sec, (0,m-len(sec)), 'constant')
-        X0[m*i:m*(i+1)] = sec
-    
-    if len(X0) > len(x0):
-        X0 = X0[:len(x0)-len(X0)]                           # trim off any extra zeros
-    return X0
+    return word.bits(X, m, len(x0))
 
 ''' probabilistic simulation '''
 def simulate_RN(x, y, c, R):
-    H = np.array([R.next() for i in range(c)])              # generate H
+    H = np.asarray(word.rows(R, c))                         # generate H
     H = Matrix(H, Z2)
     
-    s = H * Matrix(x,Z2).T()                                # calculate redundancy
-    X = np.array([0 if i < 0 else i for i in y])            # pretend erasures are 0
-    S = s - H * Matrix(X,Z2).T()                            # get right-hand side of equation
-    locs = np.where([i<0 for i in y])[0]                    # find error locations
-    h = H[:,locs]                                           # get left-hand side of equation
-    e = solve(h, S)                                         # solve for our error
-    if e is None:
+    s = syndrome(H, x)                                      # calculate redundancy
+    locs = np.flatnonzero(y < 0)                            # find error locations
+    X = decode(H, s, y, locs)                               # solve for the erased bits
+    if X is None:
         X = y
-    else:
-        X[locs] = e                                         # add in our error
     
     return X
 
-''' collect data '''
-def experiment(n, t, N):
+''' sparse probabilistic simulation: H has w 1s in each column (or row), and erasures are peeled '''
+def simulate_LDPC(x, y, c, w, by="column"):
+    H = ldpc.random((c,len(x)), w, by)                      # generate sparse H
+    
+    s = ldpc.syndrome(H, x)                                 # calculate redundancy
+    locs = np.flatnonzero(y < 0)                            # find error locations
+    X = ldpc.decode(H, s, y, locs)                          # peel, then solve the core
+    if X is None:
+        X = y
+    
+    return X
+
+''' collect data
+        if ckpt is given, progress through the N trials of each protocol is saved to it,
+            and a stopped experiment for (n,t) resumes at the first unfinished trial
+        '''
+def experiment(n, t, N, ckpt=None):
     # CONSTRUCT the list of x's
     xs = [word.random(n) for i in range(N)]
-    # CONSTRUCT the list of y's
-    ys = [channel.erasure(x,t=t) for x in xs]
+    # CONSTRUCT the list of y's, as one batch through the channel
+    ys = channel.erasure(np.array(xs), t=t)
     
-    # PICK H for RS reconciliation
-    #     note that RS has advantage of not needing to recreate H each time
-    m = 1
-    while n > m*(2**m - 1):
-        m += 1
+    # PICK F for RS reconciliation
+    #     note that RS has advantage of not needing H at all: its syndrome is just evaluations of x
+    m = word.symbol_bits(n)
     
-    F = GF(2**m)
-    nP = int(np.ceil((1.0*n)/m))  # number of polynomials in x
-    H = RS(F, (t, nP))
+    F = cache.field(2**m)
     
     # PICK R for RN reconciliation
     R = word.NUMPY(n, word.random(n))
@@ -110,23 +102,30 @@ def experiment(n, t, N):
         Dp = excess(t,d+1)
     c = d+t 
     
+    # PICK UP any trials finished before the last stop
+    key = Checkpoint.key(n,t)
+    saved = [0, 0.0, 0, 0, 0.0, 0] if ckpt is None else ckpt.get(key, [0, 0.0, 0, 0, 0.0, 0])
+    (i_RS, time_RS, err_RS, i_RN, time_RN, err_RN) = saved
+    
     # IMPLEMENT the protocol for RS reconciliation
-    now = time.time()
-    err_RS = 0
-    for i in range(N):
-        X = simulate_RS(xs[i], ys[i], m, H, F)
+    for i in range(i_RS, N):
+        now = time.time()
+        X = simulate_RS(xs[i], ys[i], m, t, F)
+        time_RS += time.time() - now
         if not all(xs[i]==X):
             err_RS += 1.0/N
-    time_RS = time.time() - now
+        if ckpt is not None:
+            ckpt.set(key, [i+1, time_RS, err_RS, i_RN, time_RN, err_RN])
     
-    # IMPLEMENT the protocol for RS reconciliation
-    now = time.time()
-    err_RN = 0
-    for i in range(N):
+    # IMPLEMENT the protocol for RN reconciliation
+    for i in range(i_RN, N):
+        now = time.time()
         X = simulate_RN(xs[i], ys[i], c, R)
+        time_RN += time.time() - now
         if not all(xs[i]==X):
             err_RN += 1.0/N
-    time_RN = time.time() - now
+        if ckpt is not None:
+            ckpt.set(key, [N, time_RS, err_RS, i+1, time_RN, err_RN])
     
     return time_RS, err_RS, time_RN, err_RN
 
@@ -158,26 +157,25 @@ tenth = start("tenth", path, ext)
 quarter = start("quarter", path, ext)
 log2 = start("log2", path, ext)
 
+# each file is paired with its t(n), and a checkpoint so that an interrupted run can be resumed
+runs = [(tenth, Checkpoint(path+"tenth"+ext), ratioofn(.1)),
+        (quarter, Checkpoint(path+"quarter"+ext), ratioofn(.25)),
+        (log2, Checkpoint(path+"log2"+ext), logofn(2))]
+
 
 N = 10
 #ns = [10]
 ns = range(2,10)
-#t_funs = [ratioofn(.1), ratioofn(.25), logofn(2)]
 
 for n in ns:
-    # t = n/10
-    t = ratioofn(.1)(n)
-    time_RS, err_RS, time_RN, err_RN = experiment(n, t, N)
-    write((n,t,N,time_RS,err_RS,time_RN,err_RN), tenth)
-    # t = n/4
-    t = ratioofn(.25)(n)
-    time_RS, err_RS, time_RN, err_RN = experiment(n, t, N)
-    write((n,t,N,time_RS,err_RS,time_RN,err_RN), quarter)
-    # t = log_2 n
-    t = logofn(2)(n)
-    time_RS, err_RS, time_RN, err_RN = experiment(n, t, N)
-    write((n,t,N,time_RS,err_RS,time_RN,err_RN), log2)
+    for (dat, ckpt, t_fun) in runs:
+        t = t_fun(n)
+        if (n,t) in finished(ckpt.rows()):     # already in the file from an earlier run
+            continue
+        time_RS, err_RS, time_RN, err_RN = experiment(n, t, N, ckpt)
+        write((n,t,N,time_RS,err_RS,time_RN,err_RN), dat)
+        ckpt.pop(Checkpoint.key(n,t))
+        ckpt.save()
     
     print "Finished simulation for n =",n
     
-
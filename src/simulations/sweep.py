@@ -0,0 +1,135 @@
+#!/usr/bin/env python
+
+import random
+import multiprocessing
+import numpy as np
+import communication.word as word
+from simulations.multivariate import simulate_batch, start
+from simulations.checkpoint import Checkpoint, progress
+from theory.multivariate import ratioofn, logofn
+
+''' Purpose:    run the multivariate experiment across every core of the machine
+                '''
+''' Process:    1) split each (n,t,c) cell into blocks of trials: each (n,t,c,block) is a work unit
+                2) give each unit its own seed, derived only from (seed,n,t,c,block)
+                3) farm the units out to a process pool, a few values of c at a time
+                4) merge the failure counts of each cell, and write N,T,C,EPS,CNT rows
+                        exactly as experiment and experiment_t would
+                '''
+''' Design:     c still grows for each (n,t) until 3 in a row are perfect,
+                    but every unfinished (n,t) advances in the same round,
+                    so the pool always has work from many cells at once
+
+                since a unit's seed does not depend on which worker runs it, or when,
+                    a sweep gives the same rows for the same seed, however many processes run it
+                    and a sweep resumed from a Checkpoint gives the same rows as one never stopped
+                '''
+
+
+''' unit_seed: seed (int), n (int), t (int), c (int), b (int)
+        returns the seed for block b of the (n,t,c) cell of a sweep seeded with seed
+        '''
+def unit_seed(seed, n, t, c, b):
+    return np.random.RandomState([seed, n, t, c, b]).randint(2**31)
+
+''' _work: unit (tuple)
+        runs one work unit (n, t, c, b, size, RNG, useed) in a worker process
+        RETURN the unit's identifier (n,t,c,b) and its number of failures
+        '''
+def _work(unit):
+    (n, t, c, b, size, RNG, useed) = unit
+    random.seed(useed)          # every seed in simulate_batch is drawn from random
+    np.random.seed(useed)
+    return (n, t, c, b), simulate_batch(size, n, t, c, RNG)
+
+
+''' sweep: N (int), ns (list of ints), RNG (random bit generator), out (file),
+            [t_fun] (int->int function), [processes] (int), [block] (int), [seed] (int),
+            [ckpt] (Checkpoint)
+        runs N experiments for each (n,t,c), as experiment does for each n in ns,
+            or as experiment_t does if t_fun is given
+        trials are split into work units of at most block trials,
+            which are run by a pool of processes (by default, one per core)
+        if ckpt is given, it must be the Checkpoint of out's file:
+            (n,t,c) already in the file are skipped, and finished units are saved as they come in
+        prints n, t, c, eps, and N for each (n,t,c) to out
+        '''
+def sweep(N, ns, RNG, out, t_fun=None, processes=None, block=100, seed=0, ckpt=None):
+    # EACH (n,t) PAIR KEEPS THE NEXT c TO RUN, AND HOW MANY PERFECTS IN A ROW IT HAS SEEN
+    done = {} if ckpt is None else progress(ckpt.rows())
+    cells = {}
+    for n in ns:
+        ts = range(1,n+1) if t_fun is None else [int(t_fun(n))]
+        for t in ts:
+            (c, perfects) = done.get((n,t), (t, 0))
+            if perfects < 3:
+                cells[(n,t)] = {'c':c, 'perfects':perfects}
+    sizes = [min(block, N-b) for b in range(0, N, block)]
+    if ckpt is not None:    # forget units whose rows were written just before the last stop
+        for key in ckpt.keys():
+            (n, t, c) = [int(k) for k in key.split(',')[:3]]
+            if c < done.get((n,t), (t, 0))[0]:
+                ckpt.pop(key)
+
+    pool = multiprocessing.Pool(processes)
+    try:
+        while cells:
+            # STEP ONE: QUEUE ENOUGH c FOR EACH UNFINISHED (n,t) TO POSSIBLY FINISH THIS ROUND
+            units = []
+            fails = {}
+            for (n,t) in sorted(cells):
+                cell = cells[(n,t)]
+                for c in range(cell['c'], cell['c'] + 3 - cell['perfects']):
+                    fails[(n,t,c)] = 0
+                    for b in range(len(sizes)):
+                        cnt = None if ckpt is None else ckpt.get(Checkpoint.key(n,t,c,b))
+                        if cnt is None:
+                            units.append((n, t, c, b, sizes[b], RNG, unit_seed(seed, n, t, c, b)))
+                        else:       # this unit finished before the sweep was stopped
+                            fails[(n,t,c)] += cnt
+
+            # STEP TWO: RUN THEM, AND MERGE THE FAILURES OF EACH CELL
+            for ((n,t,c,b), cnt) in pool.imap_unordered(_work, units):
+                fails[(n,t,c)] += cnt
+                if ckpt is not None:
+                    ckpt.set(Checkpoint.key(n,t,c,b), cnt)
+
+            # STEP THREE: RECORD EACH c IN ORDER, STOPPING WHERE EXPERIMENT WOULD
+            written = []
+            for (n,t) in sorted(cells):
+                cell = cells[(n,t)]
+                while (n, t, cell['c']) in fails and cell['perfects'] < 3:
+                    c = cell['c']
+                    eps = (1.0*fails[(n,t,c)])/N
+                    out.write(','.join([str(n), str(t), str(c), str(eps), str(N)])+"\n")
+                    cell['perfects'] = cell['perfects']+1 if eps == 0 else 0
+                    cell['c'] += 1
+                    written += [Checkpoint.key(n,t,c,b) for b in range(len(sizes))]
+                if cell['perfects'] == 3:
+                    print "----- Finished n =",n,"t =",t,"experiments at c =",cell['c'],"------"
+                    del cells[(n,t)]
+            out.flush()
+            if ckpt is not None:        # only forget units once their rows are safely written
+                ckpt.pop(*written)
+    finally:
+        pool.close()
+        pool.join()
+        if ckpt is not None:
+            ckpt.save()
+
+
+path = "../../data/multivariate/"
+ext = ".dat"
+##################################################
+#                 TARGETING t(n)
+##################################################
+if __name__ == '__main__':
+    NUMPY = start("NUMPY", path, ext)
+    ckpt = Checkpoint(path+"NUMPY"+ext)
+
+    N = 1000
+    ns = range(10,510,10)
+    t_funs = [ratioofn(.1), ratioofn(.25), logofn(2)]
+
+    for t_fun in t_funs:
+        sweep(N, ns, word.NUMPY, NUMPY, t_fun, ckpt=ckpt)